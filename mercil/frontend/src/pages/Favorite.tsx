@@ -138,35 +138,37 @@ const FavoritesPage = () => {
       try {
         setLoading(true);
 
-        // 1. Get favorite list from Python backend
-        const favResponse = await axios.get(`${API_BASE_URL}/api/favorites/list`, {
-          headers: { Authorization: `Bearer ${user.token}` }
-        });
-
-        if (!favResponse.data.success) {
-          throw new Error('Failed to fetch favorites');
-        }
+        // 1. Get favorite list from Python backend (paginated by nextCursor)
+        const favoriteItems: FavoriteItem[] = [];
+        let cursor: string | null = null;
+        do {
+          const favResponse: any = await axios.get(`${API_BASE_URL}/api/favorites/list`, {
+            headers: { Authorization: `Bearer ${user.token}` },
+            params: cursor ? { cursor } : {}
+          });
+
+          if (!favResponse.data.success) {
+            throw new Error('Failed to fetch favorites');
+          }
 
-        const favoriteItems: FavoriteItem[] = favResponse.data.favorites;
+          favoriteItems.push(...favResponse.data.favorites);
+          cursor = favResponse.data.nextCursor;
+        } while (cursor);
 
         if (favoriteItems.length === 0) {
           setFavorites([]);
           return;
         }
 
-        // 2. Fetch property details for each favorite from Python backend
-        const propertyPromises = favoriteItems.map(async (fav) => {
-          try {
-            const propResponse = await axios.get(`${API_BASE_URL}/property/${fav.propertyId}`);
-            return propResponse.data;
-          } catch (error) {
-            console.error(`Error fetching property ${fav.propertyId}:`, error);
-            return null;
-          }
-        });
-
-        const properties = await Promise.all(propertyPromises);
-        const validProperties = properties.filter((p): p is Property => p !== null);
+        // 2. Fetch property details for all favorites in batches of 100
+        const ids = favoriteItems.map((fav) => fav.propertyId);
+        const validProperties: Property[] = [];
+        for (let i = 0; i < ids.length; i += 100) {
+          const batchResponse = await axios.post(`${API_BASE_URL}/properties/batch`, {
+            ids: ids.slice(i, i + 100)
+          });
+          validProperties.push(...batchResponse.data.results);
+        }
         
         setFavorites(validProperties);
 
@@ -1,19 +1,37 @@
-from pydantic_settings import BaseSettings
-from typing import Optional
+"""
+Application settings loaded from environment variables (.env is read by load_dotenv)
+"""
+import os
+from dotenv import load_dotenv
 
+load_dotenv()
 
-class Settings(BaseSettings):
-    """Application settings loaded from environment variables"""
-    
-    MONGODB_URI: str
-    JWT_SECRET: str
-    JWT_ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_DAYS: int = 7
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
 
+def _get_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
 
-# Create a global settings instance
-settings = Settings()
\ No newline at end of file
+
+# ==================== MongoDB ====================
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = os.getenv("MONGO_DB_NAME", "real_estate_db")
+ASSETS_COLLECTION = "assets"
+
+# Connection pool (per worker process)
+MONGO_MAX_POOL_SIZE = _get_int("MONGO_MAX_POOL_SIZE", 50)
+MONGO_MIN_POOL_SIZE = _get_int("MONGO_MIN_POOL_SIZE", 5)
+MONGO_MAX_IDLE_TIME_MS = _get_int("MONGO_MAX_IDLE_TIME_MS", 300000)
+# How long a request waits for a free pooled connection before failing
+MONGO_WAIT_QUEUE_TIMEOUT_MS = _get_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000)
+
+# Timeouts
+MONGO_CONNECT_TIMEOUT_MS = _get_int("MONGO_CONNECT_TIMEOUT_MS", 5000)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = _get_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)
+MONGO_SOCKET_TIMEOUT_MS = _get_int("MONGO_SOCKET_TIMEOUT_MS", 20000)
+
+# Wire compression: comma separated list of zstd, snappy, zlib ("" disables)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zlib")
+
+# Read preference for search/catalog reads; writes and account reads stay on the primary
+MONGO_SEARCH_READ_PREFERENCE = os.getenv("MONGO_SEARCH_READ_PREFERENCE", "secondaryPreferred")
+# Optional bound on secondary lag for search reads (>= 90 seconds, 0 = unbounded)
+MONGO_SEARCH_MAX_STALENESS_SECONDS = _get_int("MONGO_SEARCH_MAX_STALENESS_SECONDS", 0)
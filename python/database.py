@@ -1,28 +1,111 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from config import settings
-
-class Database:
-    """MongoDB database connection handler"""
-    
-    client: AsyncIOMotorClient = None
-    
-    @classmethod
-    async def connect_db(cls):
-        """Connect to MongoDB"""
-        cls.client = AsyncIOMotorClient(settings.MONGODB_URI)
-    
-    @classmethod
-    async def close_db(cls):
-        """Close MongoDB connection"""
-        if cls.client:
-            cls.client.close()
-    
-    @classmethod
-    def get_db(cls):
-        """Get database instance"""
-        return cls.client.get_default_database()
-
-
-# Helper function to get database
-def get_database():
-    return Database.get_db()
\ No newline at end of file
+"""
+MongoDB connection lifecycle
+
+The process owns exactly one Motor client (one connection pool). Routes receive
+database/collection handles from main.py instead of creating their own clients.
+Handles from get_search_db() read with MONGO_SEARCH_READ_PREFERENCE; get_db()
+handles use the primary.
+"""
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred
+)
+import config
+
+_READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+_client: AsyncIOMotorClient | None = None
+
+
+def _search_read_preference():
+    """Build the read preference used for search reads"""
+    mode = _READ_PREFERENCES.get(config.MONGO_SEARCH_READ_PREFERENCE)
+    if mode is None:
+        raise ValueError(
+            f"Unknown MONGO_SEARCH_READ_PREFERENCE: {config.MONGO_SEARCH_READ_PREFERENCE} "
+            f"(expected one of {', '.join(_READ_PREFERENCES)})"
+        )
+    if mode is Primary:
+        return Primary()
+    max_staleness = config.MONGO_SEARCH_MAX_STALENESS_SECONDS or -1
+    return mode(max_staleness=max_staleness)
+
+
+def client_options() -> dict:
+    """Keyword arguments for the shared AsyncIOMotorClient"""
+    options = {
+        "maxPoolSize": config.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": config.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": config.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": config.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": config.MONGO_SOCKET_TIMEOUT_MS,
+        "appname": "real-estate-api",
+    }
+    compressors = [name.strip() for name in config.MONGO_COMPRESSORS.split(",") if name.strip()]
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+def connect() -> AsyncIOMotorClient:
+    """
+    Create the shared client (no-op if it already exists)
+
+    Creating the client does not perform I/O; connections are opened lazily and
+    by warm_up().
+
+    Returns:
+        The shared Motor client
+    """
+    global _client
+    if _client is None:
+        if not config.MONGO_URI:
+            raise ValueError("MONGO_URI must be set in environment variables.")
+        _client = AsyncIOMotorClient(config.MONGO_URI, **client_options())
+    return _client
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Get the shared client, creating it on first use"""
+    return connect()
+
+
+def get_db() -> AsyncIOMotorDatabase:
+    """Get the application database (primary reads and all writes)"""
+    return get_client()[config.DB_NAME]
+
+
+def get_search_db() -> AsyncIOMotorDatabase:
+    """Get the application database for search reads (MONGO_SEARCH_READ_PREFERENCE)"""
+    return get_client().get_database(config.DB_NAME, read_preference=_search_read_preference())
+
+
+async def warm_up():
+    """
+    Ping the primary and a search-read member so server selection, TLS and
+    authentication happen before the first request
+    """
+    await get_db().command("ping")
+    await get_search_db().command("ping", read_preference=_search_read_preference())
+    print(f"✅ MongoDB ready (pool {config.MONGO_MIN_POOL_SIZE}-{config.MONGO_MAX_POOL_SIZE}, "
+          f"search reads: {config.MONGO_SEARCH_READ_PREFERENCE})")
+
+
+def close():
+    """Close the shared client and its connection pool"""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -1,23 +1,38 @@
 import os
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
-from google import genai
+import asyncio
+from contextlib import asynccontextmanager
+from utils import startup
+from utils.lazy import LazyObject
+
+with startup.timed("fastapi"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+with startup.timed("motor"):
+    from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
 from dotenv import load_dotenv
 
+import config
+import database
+
 load_dotenv()
 
 # ==================== Configuration ====================
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = "real_estate_db"
-COLLECTION_NAME = "assets"
+MONGO_URI = config.MONGO_URI
+DB_NAME = config.DB_NAME
+COLLECTION_NAME = config.ASSETS_COLLECTION
 
 if not GEMINI_API_KEY or not MONGO_URI:
     raise ValueError("GEMINI_API_KEY and MONGO_URI must be set in environment variables.")
 
 # ==================== Global Clients ====================
-gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+def _create_gemini_client():
+    """Create the Gemini client (google.genai is the slowest import, so it is deferred)"""
+    from google import genai
+    return genai.Client(api_key=GEMINI_API_KEY)
+
+# Created on first use (first embedding/rerank call or warm-up)
+gemini_client = LazyObject("gemini client", _create_gemini_client)
 mongo_client: AsyncIOMotorClient | None = None
 db: AsyncIOMotorDatabase | None = None
 assets_collection: AsyncIOMotorCollection | None = None
@@ -28,16 +43,20 @@ def init_database():
     global mongo_client, db, assets_collection
     
     if mongo_client is None:
-        mongo_client = AsyncIOMotorClient(MONGO_URI)
-        db = mongo_client[DB_NAME]
-        assets_collection = db[COLLECTION_NAME]
+        # One shared client/pool for the whole process (see database.py)
+        with startup.timed("mongo client", kind="init"):
+            mongo_client = database.connect()
+            db = database.get_db()
+            # Search/catalog reads may go to secondaries
+            assets_collection = database.get_search_db()[COLLECTION_NAME]
         
         # Setup routes with database connection
-        from routes.auth_routes import set_database as set_auth_db
-        from routes.search_routes import set_database as set_search_db
-        from routes.favorite_routes import set_database as set_favorite_db
-        from routes.property_routes import set_database as set_property_db
-        from middleware.auth_middleware import set_database as set_middleware_db
+        with startup.timed("routes"):
+            from routes.auth_routes import set_database as set_auth_db
+            from routes.search_routes import set_database as set_search_db
+            from routes.favorite_routes import set_database as set_favorite_db
+            from routes.property_routes import set_database as set_property_db
+            from middleware.auth_middleware import set_database as set_middleware_db
         
         set_auth_db(db)
         set_search_db(db)
@@ -46,8 +65,69 @@ def init_database():
         set_middleware_db(db)
         print("✅ Database initialized")
 
+def warm_up_lazy_clients():
+    """Create lazily initialized clients and import on-demand modules ahead of the first request"""
+    gemini_client.get()
+    with startup.timed("numpy modules"):
+        import numpy
+        import utils.vector_index
+        import utils.rerankers
+
+# ==================== Lifespan ====================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background tasks on startup and stop them on shutdown"""
+    from routes.property_routes import watch_asset_changes
+    from utils.indexes import ensure_indexes, explain_hot_queries
+
+    try:
+        await database.warm_up()
+    except Exception as e:
+        print(f"⚠️ MongoDB warm-up failed: {e}")
+
+    if os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true":
+        await asyncio.to_thread(warm_up_lazy_clients)
+
+    from routes.search_routes import search_history_queue, guest_search_queue, ensure_search_storage
+
+    try:
+        await ensure_search_storage()
+    except Exception as e:
+        print(f"⚠️ Could not prepare search log collections: {e}")
+
+    try:
+        await ensure_indexes(
+            db,
+            include_vector_index=os.getenv("ENSURE_VECTOR_INDEX", "false").lower() == "true"
+        )
+        if os.getenv("EXPLAIN_ON_STARTUP", "false").lower() == "true":
+            await explain_hot_queries(db)
+    except Exception as e:
+        print(f"⚠️ Could not ensure indexes: {e}")
+
+    write_behind_queues = [search_history_queue, guest_search_queue]
+    for queue in write_behind_queues:
+        queue.start()
+
+    background_tasks = []
+    if os.getenv("WATCH_ASSET_CHANGES", "true").lower() == "true":
+        background_tasks.append(asyncio.create_task(watch_asset_changes()))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    # Drain buffered search logs before the process exits
+    for queue in write_behind_queues:
+        await queue.stop()
+
+    database.close()
+
 # ==================== FastAPI App ====================
 app = FastAPI(
+    lifespan=lifespan,
     title="Real Estate Search API",
     description="Backend API for property search with user authentication and favorites",
     version="1.0.0",
@@ -97,12 +177,31 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
+    from utils import password_pool
+    from routes.search_routes import search_history_queue, guest_search_queue
+
     db_status = "connected" if mongo_client is not None else "disconnected"
     return {
         "status": "healthy",
-        "database": db_status
+        "database": db_status,
+        "password_hashing": password_pool.stats(),
+        "search_log": {
+            "history": search_history_queue.stats(),
+            "guest": guest_search_queue.stats()
+        }
     }
 
+@app.get("/api/warmup")
+async def warmup():
+    """Initialize lazy clients now (for schedulers pinging serverless instances); returns the startup profile"""
+    await asyncio.to_thread(warm_up_lazy_clients)
+    return startup.report()
+
+@app.get("/api/debug/startup")
+async def startup_profile():
+    """Import and init timings of this process"""
+    return startup.report()
+
 # For local development
 if __name__ == "__main__":
     import uvicorn
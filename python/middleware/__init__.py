@@ -1,3 +1,3 @@
-from middleware.auth_middleware import get_current_user, get_current_user_optional
+from middleware.auth_middleware import get_current_user, get_current_user_optional, invalidate_user
 
-__all__ = ["get_current_user", "get_current_user_optional"]
\ No newline at end of file
+__all__ = ["get_current_user", "get_current_user_optional", "invalidate_user"]
\ No newline at end of file
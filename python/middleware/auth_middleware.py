@@ -1,12 +1,27 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
+from typing import Dict, Optional
 from bson import ObjectId
-from utils import verify_token
+import os
+import time
+from utils import decode_token
+from utils.cache import TTLCache
 
 
 security = HTTPBearer()
 
+# Only identity fields are loaded for the authenticated principal
+_PRINCIPAL_PROJECTION = {"name": 1, "email": 1}
+
+# Verified token -> (principal, user generation at caching time)
+_PRINCIPAL_TTL_SECONDS = float(os.getenv("AUTH_PRINCIPAL_TTL_SECONDS", "60"))
+_principal_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=_PRINCIPAL_TTL_SECONDS
+)
+# Bumped by invalidate_user(); cached principals from older generations are ignored
+_user_generations: Dict[str, int] = {}
+
 # This will be set by main.py
 _db = None
 
@@ -19,6 +34,18 @@ def get_db():
     """Get database instance for authentication"""
     return _db
 
+def invalidate_user(user_id) -> None:
+    """
+    Drop cached principals of a user
+    
+    Call after changing a user's identity fields (name, email) or removing the user.
+    
+    Args:
+        user_id: User ID (str or ObjectId)
+    """
+    key = str(user_id)
+    _user_generations[key] = _user_generations.get(key, 0) + 1
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -26,17 +53,28 @@ async def get_current_user(
     """
     Middleware to get current authenticated user
     
+    Verified tokens are cached for a short TTL together with a slim principal
+    (_id, name, email), so most requests need neither a JWT decode nor a DB read.
+    
     Args:
         credentials: HTTP Bearer token from request header
         
     Returns:
-        User document from database
+        User principal (_id, name, email)
         
     Raises:
         HTTPException: If token is invalid or user not found
     """
     token = credentials.credentials
-    user_id = verify_token(token)
+
+    cached = _principal_cache.get(token)
+    if cached is not None:
+        principal, generation = cached
+        if _user_generations.get(str(principal["_id"]), 0) == generation:
+            return dict(principal)
+
+    payload = decode_token(token)
+    user_id = payload.get("id") if payload else None
     
     if not user_id:
         raise HTTPException(
@@ -44,8 +82,9 @@ async def get_current_user(
             detail="Invalid authentication credentials"
         )
     
+    generation = _user_generations.get(user_id, 0)
     db = get_db()
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, _PRINCIPAL_PROJECTION)
     
     if not user:
         raise HTTPException(
@@ -53,7 +92,14 @@ async def get_current_user(
             detail="User not found"
         )
     
-    return user
+    # Never keep a principal past its token's expiry
+    ttl = _PRINCIPAL_TTL_SECONDS
+    if payload.get("exp"):
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _principal_cache.set(token, (user, generation), ttl=ttl)
+    
+    return dict(user)
 
 
 async def get_current_user_optional(
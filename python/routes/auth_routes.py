@@ -2,10 +2,11 @@ from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from utils import (
     create_access_token,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     is_valid_email,
-    is_strong_password
+    is_strong_password,
+    PasswordPoolBusy
 )
 
 
@@ -95,7 +96,7 @@ async def register(request: RegisterRequest):
         
         # Hash password
         print("🔐 Attempting to hash password...")
-        hashed_password = hash_password(request.password)
+        hashed_password = await hash_password_async(request.password)
         print(f"✅ Password hashed successfully: {hashed_password[:20]}...")
         
         # Create new user
@@ -103,8 +104,7 @@ async def register(request: RegisterRequest):
             "name": request.name,
             "email": request.email,
             "password": hashed_password,
-            "searchHistory": [],
-            "favorites": []
+            "searchHistory": []
         }
         
         result = await db.users.insert_one(new_user)
@@ -119,6 +119,14 @@ async def register(request: RegisterRequest):
             username=request.name
         )
         
+    except PasswordPoolBusy as error:
+        print(f"⚠️ {error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ระบบกำลังยุ่ง กรุณาลองใหม่อีกครั้ง",
+            headers={"Retry-After": "1"}
+        )
+        
     except Exception as error:
         print(f"❌ Register error: {error}")
         import traceback
@@ -153,7 +161,7 @@ async def login(request: LoginRequest):
             )
         
         # Verify password
-        is_match = verify_password(request.password, user["password"])
+        is_match = await verify_password_async(request.password, user["password"])
         
         if is_match:
             # Create token
@@ -170,6 +178,14 @@ async def login(request: LoginRequest):
                 message="อีเมลหรือรหัสผิด"
             )
         
+    except PasswordPoolBusy as error:
+        print(f"⚠️ {error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ระบบกำลังยุ่ง กรุณาลองใหม่อีกครั้ง",
+            headers={"Retry-After": "1"}
+        )
+        
     except Exception as error:
         print(f"❌ Login error: {error}")
         return AuthResponse(
@@ -1,28 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import base64
+from pymongo.errors import DuplicateKeyError
 from middleware import get_current_user
+from utils.favorites import FAVORITES_COLLECTION
 
 
 router = APIRouter(prefix="/api/favorites", tags=["Favorites"])
 
-# Get database configuration
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = "real_estate_db"
-
-_mongo_client = None
+# This will be set by main.py
 _db = None
 
 def get_db():
     """Get database instance"""
-    global _mongo_client, _db
-    if _mongo_client is None:
-        _mongo_client = AsyncIOMotorClient(MONGO_URI)
-        _db = _mongo_client[DB_NAME]
     return _db
 
 def set_database(database):
@@ -30,6 +23,33 @@ def set_database(database):
     global _db
     _db = database
 
+def get_favorites_collection():
+    """Get favorites collection"""
+    return get_db()[FAVORITES_COLLECTION]
+
+def _encode_cursor(doc: dict) -> str:
+    """Encode the (addedAt, _id) position of the last returned favorite"""
+    raw = f"{doc['addedAt'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> dict:
+    """Turn a cursor into a range filter for the next page"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        added_at, doc_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        added_at = datetime.fromisoformat(added_at)
+        doc_id = ObjectId(doc_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return {
+        "$or": [
+            {"addedAt": {"$lt": added_at}},
+            {"addedAt": added_at, "_id": {"$lt": doc_id}}
+        ]
+    }
 
 
 class FavoriteRequest(BaseModel):
@@ -53,6 +73,7 @@ class FavoritesListResponse(BaseModel):
     """Favorites list response schema"""
     success: bool
     favorites: List[Favorite] = []
+    nextCursor: Optional[str] = None
 
 
 class CheckFavoriteResponse(BaseModel):
@@ -77,35 +98,26 @@ async def add_favorite(
         Success response
     """
     try:
-        db = get_db()
-        user_id = current_user["_id"]
-        
-        # Get user favorites
-        user = await db.users.find_one({"_id": user_id})
-        favorites = user.get("favorites", [])
-        
-        # Check if already exists
-        exists = any(fav.get("propertyId") == request.propertyId for fav in favorites)
+        favorites = get_favorites_collection()
+        
+        # Idempotent add: the unique (userId, propertyId) index rejects duplicates
+        try:
+            result = await favorites.update_one(
+                {"userId": current_user["_id"], "propertyId": request.propertyId},
+                {"$setOnInsert": {"addedAt": datetime.utcnow()}},
+                upsert=True
+            )
+            added = result.upserted_id is not None
+        except DuplicateKeyError:
+            # Lost a race with a concurrent add of the same property
+            added = False
         
-        if exists:
+        if not added:
             return FavoriteResponse(
                 success=False,
                 message="Already in favorites"
             )
         
-        # Add to favorites
-        await db.users.update_one(
-            {"_id": user_id},
-            {
-                "$push": {
-                    "favorites": {
-                        "propertyId": request.propertyId,
-                        "addedAt": datetime.utcnow()
-                    }
-                }
-            }
-        )
-        
         return FavoriteResponse(
             success=True,
             message="Added to favorites"
@@ -135,17 +147,9 @@ async def remove_favorite(
         Success response
     """
     try:
-        db = get_db()
-        user_id = current_user["_id"]
-        
         # Remove from favorites
-        await db.users.update_one(
-            {"_id": user_id},
-            {
-                "$pull": {
-                    "favorites": {"propertyId": request.propertyId}
-                }
-            }
+        await get_favorites_collection().delete_one(
+            {"userId": current_user["_id"], "propertyId": request.propertyId}
         )
         
         return FavoriteResponse(
@@ -162,31 +166,39 @@ async def remove_favorite(
 
 
 @router.get("/list", response_model=FavoritesListResponse)
-async def get_favorites(current_user: dict = Depends(get_current_user)):
+async def get_favorites(
+    limit: int = Query(100, ge=1, le=500, description="จำนวนรายการต่อหน้า"),
+    cursor: Optional[str] = Query(None, description="nextCursor จากหน้าก่อนหน้า"),
+    current_user: dict = Depends(get_current_user)
+):
     """
-    Get user's favorite properties
+    Get user's favorite properties, newest first
     
     Args:
+        limit: Page size
+        cursor: nextCursor from the previous page
         current_user: Authenticated user from middleware
         
     Returns:
-        List of favorite properties
+        One page of favorite properties and the cursor of the next page
     """
+    query = {"userId": current_user["_id"]}
+    if cursor:
+        query.update(_decode_cursor(cursor))
+    
     try:
-        db = get_db()
-        user_id = current_user["_id"]
+        # Indexed range on (userId, addedAt, _id); fetch one extra to detect a next page
+        docs = await get_favorites_collection().find(
+            query,
+            {"propertyId": 1, "addedAt": 1}
+        ).sort([("addedAt", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
         
-        # Get user with only favorites field
-        user = await db.users.find_one(
-            {"_id": user_id},
-            {"favorites": 1}
-        )
-        
-        favorites = user.get("favorites", [])
+        next_cursor = _encode_cursor(docs[limit - 1]) if len(docs) > limit else None
         
         return FavoritesListResponse(
             success=True,
-            favorites=favorites
+            favorites=docs[:limit],
+            nextCursor=next_cursor
         )
         
     except Exception as error:
@@ -213,15 +225,12 @@ async def check_favorite(
         Whether property is favorited
     """
     try:
-        db = get_db()
-        user_id = current_user["_id"]
-        
-        # Get user favorites
-        user = await db.users.find_one({"_id": user_id})
-        favorites = user.get("favorites", [])
-        
-        # Check if property is in favorites
-        is_favorite = any(fav.get("propertyId") == propertyId for fav in favorites)
+        # Point lookup on the unique (userId, propertyId) index
+        doc = await get_favorites_collection().find_one(
+            {"userId": current_user["_id"], "propertyId": propertyId},
+            {"_id": 1}
+        )
+        is_favorite = doc is not None
         
         return CheckFavoriteResponse(
             success=True,
@@ -1,21 +1,145 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Header, Query, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple, TypedDict
 from bson import ObjectId
-import json
+import orjson
 import asyncio
-from functools import lru_cache
-import numpy as np
+import base64
+import math
+import functools
+import hashlib
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.cache import TTLCache
+from utils.response_cache import ResponseCache
+from utils.numeric_fields import sync_shadow_fields
+from utils.embedding_cache import (
+    EmbeddingCache,
+    InMemoryEmbeddingStore,
+    MongoEmbeddingStore,
+    normalize_text
+)
 
-router = APIRouter(tags=["Property Search"])
+# numpy-backed modules are imported on first use to keep cold starts short
+if TYPE_CHECKING:
+    import numpy as np
+    from utils.vector_index import IVFVectorIndex
+    from utils.rerankers import Reranker
+
+router = APIRouter(tags=["Property Search"], default_response_class=ORJSONResponse)
 
 # This will be set by main.py
 _db = None
 _assets_collection = None
 _gemini_client = None
 _EMBEDDING_MODEL = "text-embedding-004"
+_DEFAULT_IMAGE_URL = "https://images.unsplash.com/photo-1570129477492-45c003edd2be?q=80&w=1170&auto=format&fit=crop"
 _VECTOR_SEARCH_INDEX_NAME = "vector_index"
 
+# Embedding cache: "mongo" (shared L2 collection), "memory" (in-process stand-in) or "none"
+_EMBED_CACHE_BACKEND = os.getenv("EMBED_CACHE_BACKEND", "mongo")
+_EMBED_CACHE_TTL_SECONDS = float(os.getenv("EMBED_CACHE_TTL_DAYS", "30")) * 86400
+_EMBED_CACHE_COLLECTION = "embedding_cache"
+_embedding_cache = EmbeddingCache(_EMBEDDING_MODEL)
+
+# Rerank latency budget: past it, results keep their vector-search order
+_RERANK_TIMEOUT_MS = int(os.getenv("RERANK_TIMEOUT_MS", "800"))
+_rerank_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RERANK_MAX_WORKERS", "4")),
+    thread_name_prefix="gemini-rerank"
+)
+
+# Rerank mode per endpoint: "gemini" (LLM judge), "local" (BM25 + vector + filter features) or "hybrid"
+_RERANK_MODES = {
+    "search": os.getenv("SEARCH_RERANK_MODE", "gemini"),
+    "recommendations": os.getenv("RECOMMEND_RERANK_MODE", "gemini"),
+}
+_rerankers = {}
+
+# Rerank cache: bump _RERANK_PROMPT_VERSION whenever the rerank prompts change
+_RERANK_PROMPT_VERSION = "v1"
+_rerank_cache = TTLCache(
+    maxsize=int(os.getenv("RERANK_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("RERANK_CACHE_TTL_SECONDS", "600"))
+)
+
+# Vector retrieval backend: "atlas" ($vectorSearch) or "local" (in-process IVF index)
+_VECTOR_SEARCH_BACKEND = os.getenv("VECTOR_SEARCH_BACKEND", "atlas")
+_LOCAL_INDEX_REFRESH_SECONDS = float(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", "900"))
+_LOCAL_INDEX_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "8"))
+_LOCAL_INDEX_FILTER_FIELDS = ("asset_type_id", "price_num", "area_num")
+# Minimum seconds between rebuilds triggered by asset changes (debounces write bursts)
+_LOCAL_INDEX_MIN_REBUILD_SECONDS = float(os.getenv("LOCAL_INDEX_MIN_REBUILD_SECONDS", "60"))
+_local_index: Optional["IVFVectorIndex"] = None
+_local_index_loaded_at = 0.0
+_local_index_version = -1
+_local_index_build_started_at = float("-inf")
+_local_index_task: Optional[asyncio.Task] = None
+
+# Fields returned for every search/recommendation candidate
+_CANDIDATE_PROJECTION = {
+    "_id": 1,
+    "name_th": 1,
+    "asset_details_selling_price": 1,
+    "ai_description_th": 1,
+    "asset_details_number_of_bedrooms": 1,
+    "asset_details_number_of_bathrooms": 1,
+    "asset_details_land_size": 1,
+    "asset_type_id": 1,
+    "location_village_th": 1,
+    "location_geo": 1,
+    "image": 1,
+    "images_main_id": 1
+}
+
+# Paginated search snapshots (scored candidate lists addressed by cursor)
+_search_snapshots = TTLCache(
+    maxsize=int(os.getenv("SEARCH_SNAPSHOT_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("SEARCH_SNAPSHOT_TTL_SECONDS", "600"))
+)
+
+# Viewport map tiles (z/x/y): per-tile result cache, also invalidated by _assets_version
+_MAP_TILE_MAX_RESULTS = int(os.getenv("MAP_TILE_MAX_RESULTS", "500"))
+_MAP_TILE_BROWSER_MAX_AGE = int(os.getenv("MAP_TILE_BROWSER_MAX_AGE", "60"))
+_map_tile_cache = TTLCache(
+    maxsize=int(os.getenv("MAP_TILE_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("MAP_TILE_CACHE_TTL_SECONDS", "300"))
+)
+
+# Bumped whenever assets change; caches keyed on it are invalidated
+_assets_version = 0
+
+# Full hybrid_search responses (stale-while-revalidate, invalidated by _assets_version)
+_search_response_cache = ResponseCache(
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "120")),
+    stale_ttl=float(os.getenv("SEARCH_CACHE_STALE_SECONDS", "600"))
+)
+
+# Fields needed by map_property_detail (the large asset_vector is never loaded)
+_PROPERTY_DETAIL_PROJECTION = {
+    "name_th": 1,
+    "location_village_th": 1,
+    "asset_details_selling_price": 1,
+    "asset_details_number_of_bedrooms": 1,
+    "asset_details_number_of_bathrooms": 1,
+    "asset_details_land_size": 1,
+    "ai_description_th": 1,
+    "announcement_status_status_id": 1,
+    "image": 1,
+    "location_geo": 1
+}
+_PROPERTY_BATCH_MAX = 100
+
+# Mapped /property/{id} payloads: property_id -> (assets version, JSON body, ETag)
+_property_cache = TTLCache(
+    maxsize=int(os.getenv("PROPERTY_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("PROPERTY_CACHE_TTL_SECONDS", "600"))
+)
+
 _ASSET_TYPES = {
     "บ้านเดี่ยว": [4, 15],
     "คอนโด": [3],
@@ -27,10 +151,19 @@ _ASSET_TYPES = {
 
 def set_database(database, collection, gemini_client):
     """Set database instance from main.py"""
-    global _db, _assets_collection, _gemini_client
+    global _db, _assets_collection, _gemini_client, _embedding_cache
     _db = database
     _assets_collection = collection
     _gemini_client = gemini_client
+    _embedding_cache = EmbeddingCache(_EMBEDDING_MODEL, store=_build_embedding_store(database))
+
+def _build_embedding_store(database):
+    """Create the shared (L2) embedding store selected by EMBED_CACHE_BACKEND"""
+    if _EMBED_CACHE_BACKEND == "mongo" and database is not None:
+        return MongoEmbeddingStore(database[_EMBED_CACHE_COLLECTION], _EMBED_CACHE_TTL_SECONDS)
+    if _EMBED_CACHE_BACKEND == "memory":
+        return InMemoryEmbeddingStore(_EMBED_CACHE_TTL_SECONDS)
+    return None
 
 def get_db():
     """Get database instance"""
@@ -41,7 +174,70 @@ def get_collection():
     return _assets_collection
 
 
+def bump_assets_version():
+    """Invalidate every cache derived from the assets collection"""
+    global _assets_version
+    _assets_version += 1
+
+async def watch_asset_changes():
+    """
+    Bump the assets version on every change to the assets collection and keep
+    the numeric shadow fields (price_num/area_num) in sync with price/land size
+
+    Runs until cancelled (started from the app lifespan). Change streams need a
+    replica set or Atlas; on a standalone mongod the watcher stops and caches
+    rely on their TTLs.
+    """
+    from pymongo.errors import OperationFailure
+
+    while True:
+        try:
+            async with get_collection().watch() as stream:
+                print("✅ Watching assets collection for changes")
+                async for change in stream:
+                    bump_assets_version()
+                    try:
+                        await sync_shadow_fields(get_collection(), change)
+                    except Exception as e:
+                        print(f"⚠️ Could not refresh numeric fields for {change.get('documentKey')}: {e}")
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            print(f"⚠️ Asset change stream unavailable ({e}); caches rely on TTL expiry")
+            return
+        except Exception as e:
+            print(f"⚠️ Asset change stream interrupted ({e}); reconnecting")
+            # Changes may have been missed while disconnected
+            bump_assets_version()
+            await asyncio.sleep(5)
+
+
+# ==================== Response Types ====================
+class Coordinates(TypedDict):
+    lng: float
+    lat: float
+
+# Lean result shape shared by hybrid_search and /recommendations
+PropertySummary = TypedDict("PropertySummary", {
+    "_id": str,
+    "title": str,
+    "location": str,
+    "price": float,
+    "bedrooms": int,
+    "bathrooms": int,
+    "area": float,
+    "description": str,
+    "image": str,
+    "type_id": Optional[int],
+    "score": float,
+    "coordinates": Coordinates
+}, total=False)
+
+
 # ==================== Pydantic Models ====================
+class PropertyBatchRequest(BaseModel):
+    ids: List[str]
+
 class FavoriteItem(BaseModel):
     propertyId: str
 
@@ -79,22 +275,189 @@ def safe_int(value, default=0):
             return default
     return default
 
-@lru_cache(maxsize=1024)
-def _embed_text_sync(text: str):
-    """Embed text using Gemini (cached)"""
-    resp = _gemini_client.models.embed_content(model=_EMBEDDING_MODEL, contents=[text])
-    embedding = resp.embeddings[0].values
-    norm = sum(x * x for x in embedding) ** 0.5
-    if norm == 0:
-        return tuple(embedding)
-    return tuple(x / norm for x in embedding)
+def _normalize_embeddings(embeddings) -> "np.ndarray":
+    """L2-normalize a batch of embeddings (zero vectors are left untouched)"""
+    import numpy as np
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _embed_texts_sync(texts: List[str]) -> List[tuple]:
+    """Embed many texts using Gemini in a single API call (no caching)"""
+    resp = _gemini_client.models.embed_content(model=_EMBEDDING_MODEL, contents=texts)
+    normalized = _normalize_embeddings([e.values for e in resp.embeddings])
+    return [tuple(row.tolist()) for row in normalized]
+
+async def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed many texts, sending only cache misses to Gemini in one batch"""
+    if not texts:
+        return []
+    texts = [normalize_text(text) for text in texts]
+    unique = list(dict.fromkeys(texts))
+
+    found = await _embedding_cache.get_many(unique)
+    missing = [text for text in unique if text not in found]
+    if missing:
+        computed = await asyncio.to_thread(_embed_texts_sync, missing)
+        new_vectors = dict(zip(missing, computed))
+        await _embedding_cache.put_many(new_vectors)
+        found.update(new_vectors)
+
+    return [list(found[text]) for text in texts]
 
 async def embed_text(text: str) -> List[float]:
     """Async wrapper for text embedding"""
-    if not text:
-        text = ""
-    emb = await asyncio.to_thread(_embed_text_sync, text)
-    return list(emb)
+    return (await embed_texts([text or ""]))[0]
+
+def build_vector_filter(
+    asset_type_ids: List[int],
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_area: Optional[float] = None,
+    max_area: Optional[float] = None
+) -> Optional[dict]:
+    """
+    Build a $vectorSearch pre-filter from type and range filters
+
+    Range filters use the numeric shadow fields (price_num / area_num)
+    maintained by utils.numeric_fields.
+    """
+    conditions = []
+    if asset_type_ids:
+        conditions.append({"asset_type_id": {"$in": asset_type_ids}})
+
+    for field, low, high in (("price_num", min_price, max_price), ("area_num", min_area, max_area)):
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        if bounds:
+            conditions.append({field: bounds})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+async def _build_local_index():
+    """Load every asset vector and build a fresh index, then swap it in"""
+    from utils.vector_index import IVFVectorIndex
+
+    global _local_index, _local_index_loaded_at, _local_index_version, _local_index_task
+
+    try:
+        version = _assets_version
+        projection = {"asset_vector": 1}
+        projection.update({field: 1 for field in _LOCAL_INDEX_FILTER_FIELDS})
+        cursor = get_collection().find({"asset_vector": {"$exists": True, "$ne": None}}, projection)
+        docs = await cursor.to_list(length=None)
+
+        index = IVFVectorIndex(n_probe=_LOCAL_INDEX_NPROBE)
+        await asyncio.to_thread(
+            index.build,
+            [doc["_id"] for doc in docs],
+            [doc["asset_vector"] for doc in docs],
+            {field: [doc.get(field) for doc in docs] for field in _LOCAL_INDEX_FILTER_FIELDS}
+        )
+
+        _local_index = index
+        _local_index_loaded_at = time.monotonic()
+        _local_index_version = version
+        print(f"✅ Local vector index loaded ({len(index)} assets)")
+    finally:
+        _local_index_task = None
+
+def _start_local_index_build() -> asyncio.Task:
+    """Start a rebuild unless one is already running"""
+    global _local_index_task, _local_index_build_started_at
+
+    if _local_index_task is None:
+        _local_index_build_started_at = time.monotonic()
+        _local_index_task = asyncio.create_task(_build_local_index())
+        _local_index_task.add_done_callback(_log_local_index_error)
+    return _local_index_task
+
+def _log_local_index_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️ Local vector index rebuild failed: {task.exception()}")
+
+async def _get_local_index() -> "IVFVectorIndex":
+    """
+    Return the in-process vector index
+
+    Only the very first load is awaited. Afterwards a stale index (older than
+    LOCAL_INDEX_REFRESH_SECONDS or built before the latest asset change) keeps
+    serving while a replacement is built in the background, at most once per
+    LOCAL_INDEX_MIN_REBUILD_SECONDS.
+    """
+    if _local_index is None:
+        await asyncio.shield(_start_local_index_build())
+        return _local_index
+
+    now = time.monotonic()
+    stale = (now - _local_index_loaded_at >= _LOCAL_INDEX_REFRESH_SECONDS
+             or _local_index_version != _assets_version)
+    if stale and now - _local_index_build_started_at >= _LOCAL_INDEX_MIN_REBUILD_SECONDS:
+        _start_local_index_build()
+    return _local_index
+
+async def vector_search(
+    query_vector: List[float],
+    num_candidates: int,
+    limit: int,
+    vector_filter: Optional[dict] = None
+) -> List[dict]:
+    """
+    Retrieve nearest assets using the configured backend (VECTOR_SEARCH_BACKEND)
+
+    Args:
+        query_vector: Query embedding
+        num_candidates: Number of nearest neighbours to consider
+        limit: Number of candidates to return
+        vector_filter: Optional pre-filter in $vectorSearch.filter syntax
+
+    Returns:
+        Candidate documents (_CANDIDATE_PROJECTION fields + "score"), best first
+    """
+    collection = get_collection()
+
+    if _VECTOR_SEARCH_BACKEND == "local":
+        index = await _get_local_index()
+        # Off the event loop: probing and filtering scale with the collection size
+        hits = await asyncio.to_thread(index.search, query_vector, limit, num_candidates, vector_filter)
+        if not hits:
+            return []
+
+        cursor = collection.find({"_id": {"$in": [doc_id for doc_id, _ in hits]}}, _CANDIDATE_PROJECTION)
+        docs_by_id = {doc["_id"]: doc for doc in await cursor.to_list(length=len(hits))}
+
+        candidates = []
+        for doc_id, score in hits:
+            doc = docs_by_id.get(doc_id)
+            if doc is not None:
+                doc["score"] = score
+                candidates.append(doc)
+        return candidates
+
+    pipeline_params = {
+        "index": _VECTOR_SEARCH_INDEX_NAME,
+        "path": "asset_vector",
+        "queryVector": query_vector,
+        "numCandidates": num_candidates,
+        "limit": limit,
+    }
+    if vector_filter:
+        pipeline_params["filter"] = vector_filter
+
+    cursor = collection.aggregate([
+        {"$vectorSearch": pipeline_params},
+        {"$project": {"score": {"$meta": "vectorSearchScore"}, **_CANDIDATE_PROJECTION}}
+    ])
+    return await cursor.to_list(length=limit)
 
 def extract_query_filters(query: str):
     """Extract asset type filters from query"""
@@ -106,47 +469,129 @@ def extract_query_filters(query: str):
     remaining = " ".join(query.split())
     return remaining, list(set(selected))
 
-async def _gemini_rerank(prompt: str) -> str:
-    """Rerank results using Gemini"""
-    return await asyncio.to_thread(
-        lambda: _gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[prompt],
-            config={
-                "response_mime_type": "application/json",
-                "response_schema": {
-                    "type": "ARRAY",
-                    "items": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "id": {"type": "INTEGER"},
-                            "score": {"type": "NUMBER"}
-                        },
-                        "required": ["id", "score"]
-                    }
-                },
-                "temperature": 0.0
-            }
-        ).text
+async def _gemini_rerank(prompt: str, timeout_ms: int = _RERANK_TIMEOUT_MS) -> str:
+    """
+    Rerank results using Gemini within a latency budget
+
+    The call runs on a small dedicated executor and the SDK request carries the
+    same timeout, so a late response is abandoned instead of piling up threads.
+
+    Raises:
+        asyncio.TimeoutError: If Gemini does not answer within timeout_ms
+    """
+    call = functools.partial(
+        _gemini_client.models.generate_content,
+        model="gemini-2.5-flash",
+        contents=[prompt],
+        config={
+            "response_mime_type": "application/json",
+            "response_schema": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "id": {"type": "INTEGER"},
+                        "score": {"type": "NUMBER"}
+                    },
+                    "required": ["id", "score"]
+                }
+            },
+            "temperature": 0.0,
+            "http_options": {"timeout": timeout_ms}
+        }
     )
+    future = asyncio.get_running_loop().run_in_executor(_rerank_executor, call)
+    # wait_for cancels the future on timeout; queued work is dropped before it starts
+    response = await asyncio.wait_for(future, timeout=timeout_ms / 1000)
+    return response.text
+
+def _get_reranker(kind: str) -> "Reranker":
+    """Return the reranker configured for an endpoint kind ("search" / "recommendations")"""
+    from utils.rerankers import RERANK_MODES, build_reranker
+
+    reranker = _rerankers.get(kind)
+    if reranker is None:
+        mode = _RERANK_MODES.get(kind, "gemini")
+        if mode not in RERANK_MODES:
+            print(f"⚠️ Unknown {kind} rerank mode {mode!r} (expected one of {', '.join(RERANK_MODES)}), using gemini")
+            mode = "gemini"
+        reranker = _rerankers[kind] = build_reranker(mode, _gemini_rerank)
+    return reranker
+
+async def _rerank_candidates(
+    kind: str,
+    context: str,
+    to_rerank: list,
+    prompt: str,
+    filters: Optional[dict] = None
+) -> Tuple[dict, bool]:
+    """
+    Rerank candidates with the configured reranker, reusing cached scores for repeated requests
+
+    Args:
+        kind: Prompt family ("search" or "recommendations")
+        context: User query or persona context the prompt was built from
+        to_rerank: Candidates sent to the reranker (order matters)
+        prompt: Prompt to send to Gemini on a cache miss
+        filters: Requested filters (used by the local scorer)
+
+    Returns:
+        (mapping of 1-based candidate position -> relevance score,
+         whether the scores came from a full rerank rather than a fallback)
+    """
+    from utils.rerankers import RerankDegraded, RerankRequest
+
+    reranker = _get_reranker(kind)
+    candidate_ids = tuple(str(doc["_id"]) for doc in to_rerank)
+    cache_key = (kind, reranker.name, _RERANK_PROMPT_VERSION, normalize_text(context), candidate_ids)
+
+    cached = _rerank_cache.get(cache_key)
+    if cached is not None:
+        return {idx + 1: cached[doc_id] for idx, doc_id in enumerate(candidate_ids) if doc_id in cached}, True
+
+    scores_map = {}
+    try:
+        scores_map = await reranker.rerank(RerankRequest(kind, context, to_rerank, prompt, filters or {}))
+        _rerank_cache.set(cache_key, {
+            candidate_ids[pos - 1]: score
+            for pos, score in scores_map.items()
+            if isinstance(pos, int) and 1 <= pos <= len(candidate_ids)
+        })
+        return scores_map, True
+    except RerankDegraded as e:
+        # Partial scores still beat vector order, but are neither cached nor reported as reranked
+        print(f"⚠️ Rerank ({kind}) degraded, using {reranker.name} fallback scores: {e}")
+        return e.scores, False
+    except asyncio.TimeoutError:
+        print(f"⚠️ Rerank ({kind}) exceeded {_RERANK_TIMEOUT_MS} ms budget, using vector order")
+    except Exception as e:
+        print(f"⚠️ Rerank ({kind}) failed, using vector order: {e}")
+
+    for idx, doc in enumerate(to_rerank):
+        scores_map[idx + 1] = doc.get("score", 0.0)
+    return scores_map, False
 
 async def get_user_persona_vector(payload: UserInteraction) -> Optional[List[float]]:
     """Create user persona vector from search history and favorites"""
+    import numpy as np
+
     vectors = []
     weights = []
     collection = get_collection()
 
+    texts = []
+    text_weights = []
+
     # Handle Search History
     recent_searches = payload.searchHistory[-5:][::-1]
     
     for i, text in enumerate(recent_searches):
         if not text.strip():
             continue
-        vec = await embed_text(text)
-        vectors.append(vec)
-        weights.append(max(0.1, 0.5 - (i * 0.05)))
+        texts.append(text)
+        text_weights.append(max(0.1, 0.5 - (i * 0.05)))
 
-    # Handle Favorites
+    # Handle Favorites (reuse the stored asset_vector, embed only when missing)
     if payload.favorites:
         fav_ids = []
         for item in payload.favorites:
@@ -158,190 +603,398 @@ async def get_user_persona_vector(payload: UserInteraction) -> Optional[List[flo
         if fav_ids:
             cursor = collection.find(
                 {"_id": {"$in": fav_ids}},
-                {"name_th": 1, "ai_description_th": 1, "asset_details_selling_price": 1}
+                {"asset_vector": 1, "name_th": 1, "ai_description_th": 1, "asset_details_selling_price": 1}
             )
             fav_items = await cursor.to_list(length=None)
 
+            stored_vectors = []
             for item in fav_items:
+                if item.get("asset_vector"):
+                    stored_vectors.append(item["asset_vector"])
+                    continue
+
                 desc = f"{item.get('name_th', '')} ราคา {item.get('asset_details_selling_price', '')}"
                 if 'ai_description_th' in item:
                     desc += f" {item['ai_description_th'][:100]}"
                 
-                vec = await embed_text(desc)
-                vectors.append(vec)
-                weights.append(1.5)
+                texts.append(desc)
+                text_weights.append(1.5)
+
+            if stored_vectors:
+                vectors.extend(_normalize_embeddings(stored_vectors))
+                weights.extend([1.5] * len(stored_vectors))
+
+    # Embed the remaining texts in a single batched call
+    if texts:
+        vectors.extend(np.asarray(await embed_texts(texts), dtype=np.float32))
+        weights.extend(text_weights)
 
     if not vectors:
         return None
         
-    weighted_avg = np.average(vectors, axis=0, weights=weights)
+    weighted_avg = np.average(np.vstack(vectors), axis=0, weights=weights)
     return weighted_avg.tolist()
 
 
+# ==================== Search Pipeline ====================
+async def _retrieve_search_candidates(
+    query: str,
+    min_price: Optional[float],
+    max_price: Optional[float],
+    min_area: Optional[float],
+    max_area: Optional[float]
+) -> List[dict]:
+    """Embed the query and fetch filtered vector-search candidates (best first)"""
+    text_query, asset_type_ids = extract_query_filters(query)
+    query_text_for_embedding = text_query.strip() if text_query.strip() else "ทรัพย์สินทั้งหมด"
+    query_emb = await embed_text(query_text_for_embedding)
+
+    # Type, price and area filters are all pushed down into the vector search
+    vector_filter = build_vector_filter(asset_type_ids, min_price, max_price, min_area, max_area)
+    num_candidates = 100
+
+    return await vector_search(query_emb, num_candidates, num_candidates, vector_filter)
+
+async def _rerank_search_candidates(
+    query: str,
+    candidates: List[dict],
+    top_k: int,
+    filters: Optional[dict] = None
+) -> Tuple[dict, bool]:
+    """Rerank the head of the candidate list for a search query (scores, reranked flag)"""
+    rerank_count = min(max(3 * top_k, 10), len(candidates))
+    to_rerank = candidates[:rerank_count]
+
+    prompt = "You are an expert search relevancy judge. Respond with JSON array only.\n"
+    prompt += f"User query: \"{query}\"\nCandidates:\n"
+    for idx, doc in enumerate(to_rerank):
+        desc = doc.get("ai_description_th", "")[:1000]
+        prompt += f"{idx+1}. {doc.get('name_th','N/A')} – {desc}\n"
+    prompt += "Score each document between 0.0 and 1.0 and output JSON array like: [{\"id\":1,\"score\":0.92}, ...]"
+
+    filters = dict(filters or {})
+    filters["asset_type_ids"] = extract_query_filters(query)[1]
+    return await _rerank_candidates("search", query, to_rerank, prompt, filters)
+
+def _extract_coordinates(doc: dict) -> Optional[Coordinates]:
+    """Return {"lng", "lat"} from location_geo (GeoJSON point or [lng, lat] list)"""
+    geo = doc.get("location_geo")
+    if not geo:
+        return None
+    coords = geo.get("coordinates") if isinstance(geo, dict) else geo if isinstance(geo, list) else []
+    if not coords or len(coords) != 2:
+        return None
+    return {"lng": float(coords[0]), "lat": float(coords[1])}
+
+def map_property_summary(doc: dict, score: float) -> PropertySummary:
+    """Project a candidate document onto the lean search/recommendation result shape"""
+    image_value = doc.get("image") or doc.get("images_main_id")
+    if isinstance(image_value, (int, float)) or not image_value:
+        image_value = _DEFAULT_IMAGE_URL
+
+    result: PropertySummary = {
+        "_id": str(doc["_id"]),
+        "title": str(doc.get("name_th", "ไม่มีชื่อ")),
+        "location": doc.get("location_village_th", "ไม่มีที่อยู่"),
+        "price": safe_float(doc.get("asset_details_selling_price")),
+        "bedrooms": safe_int(doc.get("asset_details_number_of_bedrooms")),
+        "bathrooms": safe_int(doc.get("asset_details_number_of_bathrooms")),
+        "area": safe_float(doc.get("asset_details_land_size")),
+        "description": doc.get("ai_description_th", ""),
+        "image": image_value,
+        "type_id": doc.get("asset_type_id"),
+        "score": float(score)
+    }
+    coordinates = _extract_coordinates(doc)
+    if coordinates:
+        result["coordinates"] = coordinates
+    return result
+
+def map_property_detail(doc: dict) -> dict:
+    """Map an asset document to the property detail shape used by /property endpoints"""
+    property_mapped = {
+        "_id": str(doc["_id"]),
+        "title": doc.get("name_th") or "ไม่มีชื่อ",
+        "location": doc.get("location_village_th") or "ไม่มีที่อยู่",
+        "price": safe_float(doc.get("asset_details_selling_price")),
+        "bedrooms": safe_int(doc.get("asset_details_number_of_bedrooms")),
+        "bathrooms": safe_int(doc.get("asset_details_number_of_bathrooms")),
+        "area": safe_float(doc.get("asset_details_land_size")),
+        "rating": 5,
+        "description": doc.get("ai_description_th") or "-",
+        "type": "ขาย" if doc.get("announcement_status_status_id", 1) == 1 else "ไม่ขาย",
+        "image": doc.get("image") or _DEFAULT_IMAGE_URL
+    }
+
+    coordinates = _extract_coordinates(doc)
+    if coordinates:
+        property_mapped["coordinates"] = coordinates
+
+    return property_mapped
+
+def rank_results(candidates: List[dict], scores_map: dict, top_k: int) -> List[PropertySummary]:
+    """
+    Order candidates by rerank score (vector score when unscored) and map only the top_k
+
+    Args:
+        candidates: Vector-search candidates (left unmodified)
+        scores_map: 1-based candidate position -> rerank score
+        top_k: Number of results to return
+    """
+    return [map_property_summary(candidates[i], score) for i, score in _rank_order(candidates, scores_map, top_k)]
+
+def _rank_order(candidates: List[dict], scores_map: dict, top_k: int) -> List[Tuple[int, float]]:
+    """Return (candidate index, score) pairs of the top_k candidates, best first"""
+    scores = [scores_map.get(idx + 1, doc.get("score", 0.0)) for idx, doc in enumerate(candidates)]
+    order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[:top_k]
+    return [(i, scores[i]) for i in order]
+
+
+class _SearchSnapshot:
+    """Filtered, vector-ordered candidate list of one search, paged lazily"""
+
+    def __init__(self, candidates: List[dict]):
+        self.candidates = candidates
+        self.remaining = list(range(len(candidates)))
+        self.pages: List[Tuple[List[PropertySummary], bool]] = []
+        self.lock = asyncio.Lock()
+
+    def has_page(self, page: int) -> bool:
+        return page < len(self.pages) or bool(self.remaining)
+
+    async def get_page(self, page: int, query: str, page_size: int, filters: dict) -> Tuple[List[PropertySummary], bool]:
+        """
+        Return (results, reranked) for a 0-based page
+
+        Each new page reranks only the next window of not-yet-returned
+        candidates; earlier pages are kept so cursors can be replayed.
+        """
+        async with self.lock:
+            while len(self.pages) <= page and self.remaining:
+                window = self.remaining[:max(3 * page_size, 10)]
+                to_rerank = [self.candidates[i] for i in window]
+                scores_map, reranked = await _rerank_search_candidates(query, to_rerank, page_size, filters)
+
+                ranked = _rank_order(to_rerank, scores_map, page_size)
+                emitted = {window[i] for i, _ in ranked}
+                self.remaining = [i for i in self.remaining if i not in emitted]
+                self.pages.append((
+                    [map_property_summary(to_rerank[i], score) for i, score in ranked],
+                    reranked
+                ))
+
+        if page >= len(self.pages):
+            return [], False
+        return self.pages[page]
+
+def _encode_cursor(state: dict) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(state)).decode("ascii").rstrip("=")
+
+# Largest page size a cursor may carry
+_MAX_CURSOR_PAGE_SIZE = 100
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _validate_cursor_state(state) -> Optional[str]:
+    """Return why a decoded cursor is unusable, or None when it is valid"""
+    if not isinstance(state, dict) or not {"s", "p", "q", "k", "f"} <= state.keys():
+        return "missing fields"
+    if not isinstance(state["s"], str) or not isinstance(state["q"], str):
+        return "s and q must be strings"
+    if not _is_int(state["p"]) or state["p"] < 0:
+        return "p must be a non-negative integer"
+    if not _is_int(state["k"]) or not 1 <= state["k"] <= _MAX_CURSOR_PAGE_SIZE:
+        return f"k must be an integer between 1 and {_MAX_CURSOR_PAGE_SIZE}"
+    f = state["f"]
+    if not isinstance(f, list) or len(f) != 4 or not all(
+        v is None or ((_is_int(v) or isinstance(v, float)) and math.isfinite(v)) for v in f
+    ):
+        return "f must be a list of 4 numbers or nulls"
+    return None
+
+def _decode_cursor(cursor: str) -> dict:
+    try:
+        state = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+
+    error = _validate_cursor_state(state)
+    if error:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {error}")
+    return state
+
+async def _search_page_response(snapshot_id: str, snapshot: _SearchSnapshot, state: dict) -> dict:
+    """Build one page of a paginated search response"""
+    query, page, page_size = state["q"], state["p"], state["k"]
+    filters = dict(zip(("min_price", "max_price", "min_area", "max_area"), state["f"]))
+
+    results, reranked = await snapshot.get_page(page, query, page_size, filters)
+
+    next_cursor = None
+    if snapshot.has_page(page + 1):
+        next_cursor = _encode_cursor({**state, "s": snapshot_id, "p": page + 1})
+
+    return {"query": query, "results": results, "reranked": reranked, "next_cursor": next_cursor}
+
+
+async def _run_hybrid_search(
+    query: str,
+    top_k: int,
+    min_price: Optional[float],
+    max_price: Optional[float],
+    min_area: Optional[float],
+    max_area: Optional[float]
+) -> dict:
+    """Run the full hybrid search pipeline (uncached)"""
+    try:
+        candidates = await _retrieve_search_candidates(query, min_price, max_price, min_area, max_area)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"query": query, "results": [], "error": str(e)}
+
+    if not candidates:
+        return {"query": query, "results": []}
+
+    # Keep the scored candidate list so further pages are served from it
+    snapshot_id = secrets.token_urlsafe(12)
+    snapshot = _SearchSnapshot(candidates)
+    _search_snapshots.set(snapshot_id, snapshot)
+
+    state = {"s": snapshot_id, "p": 0, "q": query, "k": top_k, "f": [min_price, max_price, min_area, max_area]}
+    return await _search_page_response(snapshot_id, snapshot, state)
+
+async def _continue_hybrid_search(cursor: str) -> dict:
+    """Serve the page a cursor points to, rebuilding the snapshot if it has expired"""
+    state = _decode_cursor(cursor)
+    snapshot_id = state["s"]
+    snapshot = _search_snapshots.get(snapshot_id)
+
+    if snapshot is None:
+        min_price, max_price, min_area, max_area = state["f"]
+        try:
+            candidates = await _retrieve_search_candidates(state["q"], min_price, max_price, min_area, max_area)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return {"query": state["q"], "results": [], "error": str(e)}
+        snapshot = _SearchSnapshot(candidates)
+        _search_snapshots.set(snapshot_id, snapshot)
+
+    return await _search_page_response(snapshot_id, snapshot, state)
+
+
 # ==================== API Endpoints ====================
 @router.get("/hybrid_search")
 async def hybrid_search(
     query: str = Query("ทรัพย์สินทั้งหมด", description="คำค้นหา"),
-    top_k: int = 10,
+    top_k: int = Query(10, ge=1, le=_MAX_CURSOR_PAGE_SIZE),
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     min_area: Optional[float] = None,
-    max_area: Optional[float] = None
+    max_area: Optional[float] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor จากหน้าก่อนหน้า")
 ):
     """
     Hybrid search with vector similarity and filters
     
     Args:
         query: Search query
-        top_k: Number of results to return
+        top_k: Number of results to return (page size)
         min_price: Minimum price filter
         max_price: Maximum price filter
         min_area: Minimum area filter
         max_area: Maximum area filter
+        cursor: Opaque cursor from a previous response's next_cursor; when
+            given, the other parameters are taken from the cursor
         
     Returns:
-        Search results with property details
+        Search results with property details and next_cursor (None on the last page)
     """
-    collection = get_collection()
-    text_query, asset_type_ids = extract_query_filters(query)
-    query_text_for_embedding = text_query.strip() if text_query.strip() else "ทรัพย์สินทั้งหมด"
-    query_emb = await embed_text(query_text_for_embedding)
+    if cursor:
+        return ORJSONResponse(await _continue_hybrid_search(cursor))
 
-    has_price_filter = min_price is not None or max_price is not None
-    has_area_filter = min_area is not None or max_area is not None
-    num_candidates = 500 if (has_price_filter or has_area_filter) else 100
+    cache_key = (normalize_text(query), top_k, min_price, max_price, min_area, max_area)
 
-    pipeline_params = {
-        "index": _VECTOR_SEARCH_INDEX_NAME,
-        "path": "asset_vector",
-        "queryVector": query_emb,
-        "numCandidates": num_candidates,
-        "limit": num_candidates,
-    }
+    async def compute():
+        return await _run_hybrid_search(query, top_k, min_price, max_price, min_area, max_area)
 
-    if asset_type_ids:
-        pipeline_params["filter"] = {"asset_type_id": {"$in": asset_type_ids}}
+    response = await _search_response_cache.get_or_compute(
+        cache_key,
+        _assets_version,
+        compute,
+        # Errors and vector-order fallbacks are not worth keeping around
+        should_cache=lambda response: "error" not in response and response.get("reranked", True)
+    )
+    return ORJSONResponse({**response, "query": query})
 
-    try:
-        cursor = collection.aggregate([
-            {"$vectorSearch": pipeline_params},
-            {"$project": {
-                "score": {"$meta": "vectorSearchScore"},
-                "_id": 1,
-                "name_th": 1,
-                "asset_details_selling_price": 1,
-                "ai_description_th": 1,
-                "asset_details_number_of_bedrooms": 1,
-                "asset_details_number_of_bathrooms": 1,
-                "asset_details_land_size": 1,
-                "asset_type_id": 1,
-                "location_village_th": 1,
-                "location_geo": 1,
-                "image": 1,
-                "images_main_id": 1
-            }}
-        ])
-        
-        candidates = await cursor.to_list(length=num_candidates)
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return {"query": query, "results": [], "error": str(e)}
 
-    # Apply price filter
-    if has_price_filter:
-        filtered = []
-        for doc in candidates:
-            price = safe_float(doc.get("asset_details_selling_price", 0))
-            doc["asset_details_selling_price"] = price
-            
-            if min_price is not None and price < min_price:
-                continue
-            if max_price is not None and price > max_price:
-                continue
-            
-            filtered.append(doc)
-        candidates = filtered
-
-    # Apply area filter
-    if has_area_filter:
-        filtered_area = []
-        for doc in candidates:
-            area = safe_float(doc.get("asset_details_land_size", 0))
-            doc["asset_details_land_size"] = area
-            
-            if min_area is not None and area < min_area:
-                continue
-            if max_area is not None and area > max_area:
-                continue
-            
-            filtered_area.append(doc)
-        candidates = filtered_area
+@router.get("/hybrid_search/stream")
+async def hybrid_search_stream(
+    query: str = Query("ทรัพย์สินทั้งหมด", description="คำค้นหา"),
+    top_k: int = 10,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_area: Optional[float] = None,
+    max_area: Optional[float] = None
+):
+    """
+    Progressive hybrid search streamed as NDJSON
 
-    if not candidates:
-        return {"query": query, "results": []}
+    Emits one JSON object per line:
+        {"event": "vector", ...}    vector-ordered top_k, right after the vector search
+        {"event": "reranked", ...}  final order once the Gemini rerank returns
+        {"event": "error", ...}     if retrieval fails
 
-    # Rerank with Gemini
-    rerank_count = min(max(3 * top_k, 10), len(candidates))
-    to_rerank = candidates[:rerank_count]
+    Args are the same as /hybrid_search.
+    """
+    def encode(event: dict) -> bytes:
+        return orjson.dumps(event) + b"\n"
 
-    prompt = "You are an expert search relevancy judge. Respond with JSON array only.\n"
-    prompt += f"User query: \"{query}\"\nCandidates:\n"
-    for idx, doc in enumerate(to_rerank):
-        desc = doc.get("ai_description_th", "")[:1000]
-        prompt += f"{idx+1}. {doc.get('name_th','N/A')} – {desc}\n"
-    prompt += "Score each document between 0.0 and 1.0 and output JSON array like: [{\"id\":1,\"score\":0.92}, ...]"
+    async def events():
+        try:
+            candidates = await _retrieve_search_candidates(query, min_price, max_price, min_area, max_area)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield encode({"event": "error", "query": query, "results": [], "error": str(e)})
+            return
 
-    scores_map = {}
-    try:
-        text = await _gemini_rerank(prompt)
-        parsed = json.loads(text)
-        scores_map = {item["id"]: item["score"] for item in parsed}
-    except Exception:
-        for idx, doc in enumerate(to_rerank):
-            scores_map[idx + 1] = doc.get("score", 0.0)
-
-    # Prepare results
-    for idx, doc in enumerate(candidates):
-        doc["_rerank_score"] = scores_map.get(idx + 1, doc.get("score", 0.0))
-        doc["_id"] = str(doc["_id"])
-        doc["title"] = str(doc.get("name_th", "ไม่มีชื่อ"))
-        doc["bedrooms"] = safe_int(doc.get("asset_details_number_of_bedrooms"))
-        doc["bathrooms"] = safe_int(doc.get("asset_details_number_of_bathrooms"))
-        doc["description"] = doc.get("ai_description_th", "")
-        doc["area"] = safe_float(doc.get("asset_details_land_size"))
-        doc["location"] = doc.get("location_village_th", "ไม่มีที่อยู่")
-        doc["price"] = safe_float(doc.get("asset_details_selling_price"))
-        
-        # Handle image
-        image_value = doc.get("image") or doc.get("images_main_id")
-        if isinstance(image_value, (int, float)) or not image_value:
-            doc["image"] = "https://images.unsplash.com/photo-1570129477492-45c003edd2be?q=80&w=1170&auto=format&fit=crop&ixlib=rb-4.1.0&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D"
-        else:
-            doc["image"] = image_value
-
-        # Handle coordinates
-        if "location_geo" in doc and doc["location_geo"]:
-            geo = doc["location_geo"]
-            coords = geo.get("coordinates") if isinstance(geo, dict) else geo if isinstance(geo, list) else []
-            
-            if len(coords) == 2:
-                doc["coordinates"] = {"lng": float(coords[0]), "lat": float(coords[1])}
+        vector_results = rank_results(candidates, {}, top_k)
+        yield encode({"event": "vector", "query": query, "results": vector_results})
 
-    results_sorted = sorted(candidates, key=lambda d: d["_rerank_score"], reverse=True)
-    final_results = results_sorted[:top_k]
-    
-    return {"query": query, "results": final_results}
+        if not candidates:
+            return
+
+        filters = {"min_price": min_price, "max_price": max_price, "min_area": min_area, "max_area": max_area}
+        scores_map, reranked = await _rerank_search_candidates(query, candidates, top_k, filters)
+        final_results = rank_results(candidates, scores_map, top_k)
+        yield encode({"event": "reranked", "query": query, "results": final_results, "reranked": reranked})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
 
 
 @router.get("/property/{property_id}")
-async def get_property(property_id: str):
+async def get_property(property_id: str, if_none_match: Optional[str] = Header(None)):
     """
     Get property details by ID
     
+    Mapped payloads are cached in process and served with an ETag; a matching
+    If-None-Match returns 304 without a body.
+    
     Args:
         property_id: Property ID (MongoDB ObjectId)
+        if_none_match: ETag from a previous response (optional)
         
     Returns:
         Property details
@@ -353,37 +1006,68 @@ async def get_property(property_id: str):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid property ID: {str(e)}")
 
-    try:
-        property_doc = await collection.find_one({"_id": obj_id})
-        
+    cached = _property_cache.get(property_id)
+    if cached is None or cached[0] != _assets_version:
+        version = _assets_version
+        try:
+            property_doc = await collection.find_one({"_id": obj_id}, _PROPERTY_DETAIL_PROJECTION)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
         if not property_doc:
             raise HTTPException(status_code=404, detail="Property not found")
 
-        property_mapped = {
-            "_id": str(property_doc["_id"]),
-            "title": property_doc.get("name_th") or "ไม่มีชื่อ",
-            "location": property_doc.get("location_village_th") or "ไม่มีที่อยู่",
-            "price": safe_float(property_doc.get("asset_details_selling_price")),
-            "bedrooms": safe_int(property_doc.get("asset_details_number_of_bedrooms")),
-            "bathrooms": safe_int(property_doc.get("asset_details_number_of_bathrooms")),
-            "area": safe_float(property_doc.get("asset_details_land_size")),
-            "rating": 5,
-            "description": property_doc.get("ai_description_th") or "-",
-            "type": "ขาย" if property_doc.get("announcement_status_status_id", 1) == 1 else "ไม่ขาย",
-            "image": property_doc.get("image") or "https://images.unsplash.com/photo-1570129477492-45c003edd2be?q=80&w=1170&auto=format&fit=crop&ixlib=rb-4.1.0&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D"
-        }
+        body = orjson.dumps(map_property_detail(property_doc))
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        cached = (version, body, etag)
+        _property_cache.set(property_id, cached)
+
+    _, body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
-        if "location_geo" in property_doc and property_doc["location_geo"]:
-            geo = property_doc["location_geo"]
-            coords = geo.get("coordinates") if isinstance(geo, dict) else geo if isinstance(geo, list) else []
-            
-            if len(coords) == 2:
-                property_mapped["coordinates"] = {"lng": float(coords[0]), "lat": float(coords[1])}
 
-        return property_mapped
+@router.post("/properties/batch")
+async def get_properties_batch(payload: PropertyBatchRequest):
+    """
+    Get details of many properties in one request (favorites page, listing grids)
+    
+    Args:
+        payload: Property IDs (max 100), results keep this order
         
-    except HTTPException:
-        raise
+    Returns:
+        Property details in requested order and the IDs that were not found
+    """
+    collection = get_collection()
+    requested = list(dict.fromkeys(payload.ids))
+
+    if len(requested) > _PROPERTY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Too many IDs (max {_PROPERTY_BATCH_MAX})")
+
+    obj_ids = [ObjectId(property_id) for property_id in requested if ObjectId.is_valid(property_id)]
+
+    try:
+        docs_by_id = {}
+        if obj_ids:
+            cursor = collection.find({"_id": {"$in": obj_ids}}, _PROPERTY_DETAIL_PROJECTION)
+            docs_by_id = {str(doc["_id"]): doc for doc in await cursor.to_list(length=len(obj_ids))}
+
+        results = []
+        missing = []
+        for property_id in requested:
+            doc = docs_by_id.get(property_id)
+            if doc is None:
+                missing.append(property_id)
+            else:
+                results.append(map_property_detail(doc))
+
+        return {"count": len(results), "results": results, "missing": missing}
+
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -402,7 +1086,6 @@ async def get_recommendations(payload: UserInteraction, limit: int = 10):
     Returns:
         Personalized property recommendations
     """
-    collection = get_collection()
     user_vector = await get_user_persona_vector(payload)
     
     if not user_vector:
@@ -415,37 +1098,8 @@ async def get_recommendations(payload: UserInteraction, limit: int = 10):
         except:
             pass
 
-    pipeline = [
-        {
-            "$vectorSearch": {
-                "index": _VECTOR_SEARCH_INDEX_NAME,
-                "path": "asset_vector",
-                "queryVector": user_vector,
-                "numCandidates": limit * 10,
-                "limit": limit * 5
-            }
-        },
-        {
-            "$project": {
-                "score": {"$meta": "vectorSearchScore"},
-                "_id": 1,
-                "name_th": 1,
-                "asset_details_selling_price": 1,
-                "ai_description_th": 1,
-                "asset_details_number_of_bedrooms": 1,
-                "asset_details_number_of_bathrooms": 1,
-                "asset_details_land_size": 1,
-                "location_village_th": 1,
-                "location_geo": 1,
-                "image": 1,
-                "images_main_id": 1
-            }
-        }
-    ]
-
     try:
-        cursor = collection.aggregate(pipeline)
-        candidates = await cursor.to_list(length=limit * 5)
+        candidates = await vector_search(user_vector, limit * 10, limit * 5)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -472,43 +1126,27 @@ async def get_recommendations(payload: UserInteraction, limit: int = 10):
     prompt += "\nScore each property between 0.0 and 1.0 based on relevance to user interests.\n"
     prompt += "Output JSON array: [{\"id\":1,\"score\":0.92}, ...]"
 
-    scores_map = {}
-    try:
-        text = await _gemini_rerank(prompt)
-        parsed = json.loads(text)
-        scores_map = {item["id"]: item["score"] for item in parsed}
-    except Exception:
-        for idx, doc in enumerate(to_rerank):
-            scores_map[idx + 1] = doc.get("score", 0.0)
-
-    # Prepare results
-    for idx, doc in enumerate(candidates):
-        doc["_rerank_score"] = scores_map.get(idx + 1, doc.get("score", 0.0))
-        doc["_id"] = str(doc["_id"])
-        doc["title"] = str(doc.get("name_th", "ไม่มีชื่อ"))
-        doc["bedrooms"] = safe_int(doc.get("asset_details_number_of_bedrooms"))
-        doc["bathrooms"] = safe_int(doc.get("asset_details_number_of_bathrooms"))
-        doc["description"] = doc.get("ai_description_th", "")
-        doc["area"] = safe_float(doc.get("asset_details_land_size"))
-        doc["location"] = doc.get("location_village_th", "ไม่มีที่อยู่")
-        doc["price"] = safe_float(doc.get("asset_details_selling_price"))
-        
-        image_value = doc.get("image") or doc.get("images_main_id")
-        if isinstance(image_value, (int, float)) or not image_value:
-            doc["image"] = "https://images.unsplash.com/photo-1570129477492-45c003edd2be?q=80&w=1170&auto=format&fit=crop&ixlib=rb-4.1.0&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D"
-        else:
-            doc["image"] = image_value
-
-        if "location_geo" in doc and doc["location_geo"]:
-            geo = doc["location_geo"]
-            coords = geo.get("coordinates") if isinstance(geo, dict) else geo if isinstance(geo, list) else []
-            if len(coords) == 2:
-                doc["coordinates"] = {"lng": float(coords[0]), "lat": float(coords[1])}
+    scores_map, reranked = await _rerank_candidates("recommendations", search_context, to_rerank, prompt)
+
+    final_results = rank_results(candidates, scores_map, limit)
 
-    results_sorted = sorted(candidates, key=lambda d: d["_rerank_score"], reverse=True)
-    final_results = results_sorted[:limit]
+    return ORJSONResponse({"count": len(final_results), "results": final_results, "reranked": reranked})
 
-    return {"count": len(final_results), "results": final_results}
+
+@router.get("/debug/cache-stats")
+async def debug_cache_stats():
+    """
+    Debug endpoint to inspect in-process cache hit/miss counters
+    """
+    return {
+        "embedding_cache": _embedding_cache.stats(),
+        "rerank_cache": _rerank_cache.stats(),
+        "search_response_cache": _search_response_cache.stats(),
+        "search_snapshots": _search_snapshots.stats(),
+        "map_tile_cache": _map_tile_cache.stats(),
+        "property_cache": _property_cache.stats(),
+        "assets_version": _assets_version
+    }
 
 
 @router.get("/debug/geo-check")
@@ -629,15 +1267,16 @@ async def map_search(
         lat: Latitude of center point
         lng: Longitude of center point
         radius_km: Search radius in kilometers (default: 5km)
-        limit: Maximum number of results (default: 50)
+        limit: Maximum number of distinct map pins (default: 50)
         
     Returns:
-        Properties within the specified radius with essential map data
+        Properties within the specified radius with essential map data, one per
+        coordinate (nearest listing kept, colocated_count = listings at that spot)
     """
     collection = get_collection()
     
     try:
-        # Use aggregation pipeline for better control
+        # Nearest-first, one pin per rounded coordinate, limit applied after dedup
         pipeline = [
             {
                 "$geoNear": {
@@ -660,54 +1299,275 @@ async def map_search(
                     "location_geo": 1,
                     "images_main_id": 1,
                     "asset_type_id": 1,
-                    "distance": 1
+                    "distance": 1,
+                    "lng": {"$arrayElemAt": ["$location_geo.coordinates", 0]},
+                    "lat": {"$arrayElemAt": ["$location_geo.coordinates", 1]}
+                }
+            },
+            {"$match": {"lng": {"$type": "number", "$ne": 0}, "lat": {"$type": "number", "$ne": 0}}},
+            {
+                # $geoNear output is sorted by distance, so $first keeps the nearest listing
+                "$group": {
+                    "_id": {"lng": {"$round": ["$lng", 5]}, "lat": {"$round": ["$lat", 5]}},
+                    "doc": {"$first": "$$ROOT"},
+                    "colocated_count": {"$sum": 1}
                 }
             },
+            {"$sort": {"doc.distance": 1}},
+            {"$limit": limit},
             {
-                "$limit": limit
+                "$replaceRoot": {
+                    "newRoot": {"$mergeObjects": ["$doc", {"colocated_count": "$colocated_count"}]}
+                }
             }
         ]
         
         cursor = collection.aggregate(pipeline)
         results = await cursor.to_list(length=limit)
-        
-        # Remove duplicates based on coordinates
-        seen_coords = set()
-        valid_results = []
-        
+
+        map_results = []
         for doc in results:
-            location_geo = doc.get("location_geo")
-            
-            if location_geo:
-                coords = location_geo.get("coordinates") if isinstance(location_geo, dict) else None
-                
-                # Validate coordinates
-                if (coords and 
-                    isinstance(coords, list) and 
-                    len(coords) == 2 and
-                    coords[0] != 0 and 
-                    coords[1] != 0):
-                    
-                    # Create a unique key for this coordinate (rounded to 5 decimals)
-                    coord_key = (round(coords[0], 5), round(coords[1], 5))
-                    
-                    # Skip if we've seen this coordinate before
-                    if coord_key not in seen_coords:
-                        seen_coords.add(coord_key)
-                        valid_results.append(doc)
+            item = serialize_doc(doc)
+            item["colocated_count"] = doc["colocated_count"]
+            map_results.append(item)
+
+        total_found = sum(doc["colocated_count"] for doc in results)
         
         return {
-            "count": len(valid_results),
+            "count": len(map_results),
             "center": {"lat": lat, "lng": lng},
             "radius_km": radius_km,
-            "results": [serialize_doc(doc) for doc in valid_results],
+            "results": map_results,
             "debug": {
-                "total_found": len(results),
-                "duplicates_removed": len(results) - len(valid_results)
+                "total_found": total_found,
+                "duplicates_removed": total_found - len(map_results)
+            }
+        }
+        
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Map search error: {str(e)}")
+
+def _bbox_geometry(min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> dict:
+    """GeoJSON polygon for a lat/lng bounding box (usable with a 2dsphere index)"""
+    return {
+        "type": "Polygon",
+        "coordinates": [[
+            [min_lng, min_lat],
+            [max_lng, min_lat],
+            [max_lng, max_lat],
+            [min_lng, max_lat],
+            [min_lng, min_lat]
+        ]]
+    }
+
+
+# Widest box still queried as a GeoJSON polygon (a z2 tile); wider boxes can
+# exceed a hemisphere, which $geoWithin cannot express
+_GEO_POLYGON_MAX_SPAN_DEG = 90.0
+# Web Mercator latitude limit
+_MERCATOR_MAX_LAT = 85.05112878
+
+
+def _bbox_query(min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> dict:
+    """location_geo filter for a lat/lng bounding box, falling back to a coordinate range for wide boxes"""
+    if max_lng - min_lng <= _GEO_POLYGON_MAX_SPAN_DEG and max_lat - min_lat <= _GEO_POLYGON_MAX_SPAN_DEG:
+        return {
+            "location_geo": {
+                "$geoWithin": {"$geometry": _bbox_geometry(min_lat, min_lng, max_lat, max_lng)}
+            }
+        }
+    return {
+        "location_geo.coordinates.0": {"$gte": min_lng, "$lte": max_lng},
+        "location_geo.coordinates.1": {"$gte": min_lat, "$lte": max_lat}
+    }
+
+
+def _mercator_row_expr(grid_size: int) -> dict:
+    """Aggregation expression: Web Mercator grid row of $lat for a grid_size x grid_size world grid"""
+    clamped = {"$max": [{"$min": ["$lat", _MERCATOR_MAX_LAT]}, -_MERCATOR_MAX_LAT]}
+    return {
+        "$let": {
+            "vars": {"rad": {"$degreesToRadians": clamped}},
+            "in": {
+                "$floor": {
+                    "$multiply": [
+                        {"$divide": [
+                            {"$subtract": [1, {"$divide": [
+                                # asinh(tan(lat)) = ln(tan(lat) + sec(lat))
+                                {"$ln": {"$add": [{"$tan": "$$rad"}, {"$divide": [1, {"$cos": "$$rad"}]}]}},
+                                math.pi
+                            ]}]},
+                            2
+                        ]},
+                        grid_size
+                    ]
+                }
+            }
+        }
+    }
+
+
+@router.get("/map_clusters")
+async def map_clusters(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22),
+    cells_per_tile: int = Query(4, ge=1, le=16),
+    max_clusters: int = Query(500, ge=1, le=2000)
+):
+    """
+    Aggregate properties in a bounding box into grid clusters (for zoomed-out map views)
+    
+    The grid follows slippy-map (Web Mercator) tiles: every 256px tile at the given
+    zoom is split into cells_per_tile x cells_per_tile cells, so cluster density
+    matches what is visible on screen and the payload size does not grow with
+    listing density. Boxes wider than 90 degrees are matched by coordinate range.
+    
+    Args:
+        min_lat, min_lng, max_lat, max_lng: Viewport bounding box
+        zoom: Map zoom level
+        cells_per_tile: Grid cells per tile side
+        max_clusters: Maximum number of clusters returned (largest first)
+        
+    Returns:
+        Clusters with count, centroid and price range
+    """
+    if min_lat >= max_lat or min_lng >= max_lng:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+
+    collection = get_collection()
+    grid_size = (2 ** zoom) * cells_per_tile
+    cell_size = 360.0 / grid_size
+
+    try:
+        pipeline = [
+            {"$match": _bbox_query(min_lat, min_lng, max_lat, max_lng)},
+            {
+                "$project": {
+                    "lng": {"$arrayElemAt": ["$location_geo.coordinates", 0]},
+                    "lat": {"$arrayElemAt": ["$location_geo.coordinates", 1]},
+                    "price_num": 1
+                }
+            },
+            {"$match": {"lng": {"$type": "number", "$ne": 0}, "lat": {"$type": "number", "$ne": 0}}},
+            {
+                "$group": {
+                    "_id": {
+                        "x": {"$floor": {"$divide": [{"$add": ["$lng", 180]}, cell_size]}},
+                        "y": _mercator_row_expr(grid_size)
+                    },
+                    "count": {"$sum": 1},
+                    "lng": {"$avg": "$lng"},
+                    "lat": {"$avg": "$lat"},
+                    "min_price": {"$min": "$price_num"},
+                    "max_price": {"$max": "$price_num"},
+                    "property_id": {"$first": "$_id"}
+                }
+            },
+            {"$sort": {"count": -1}},
+            {"$limit": max_clusters}
+        ]
+
+        cursor = collection.aggregate(pipeline)
+        groups = await cursor.to_list(length=max_clusters)
+
+        clusters = []
+        for group in groups:
+            cluster = {
+                "lat": group["lat"],
+                "lng": group["lng"],
+                "count": group["count"],
+                "min_price": group.get("min_price"),
+                "max_price": group.get("max_price")
             }
+            if group["count"] == 1:
+                cluster["property_id"] = str(group["property_id"])
+            clusters.append(cluster)
+
+        return {
+            "zoom": zoom,
+            "cell_size_deg": cell_size,
+            "total": sum(cluster["count"] for cluster in clusters),
+            "clusters": clusters
         }
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Map cluster error: {str(e)}")
+
+
+def _tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Return (min_lat, min_lng, max_lat, max_lng) of a slippy-map tile"""
+    n = 2 ** z
+
+    def tile_lat(tile_y: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return tile_lat(y + 1), x / n * 360.0 - 180.0, tile_lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+@router.get("/map_tiles/{z}/{x}/{y}")
+async def map_tile(z: int, x: int, y: int, response: Response):
+    """
+    Properties inside one slippy-map tile (z/x/y), for viewport map display
+    
+    Tiles have fixed bounds, so results are cached per tile and panning only
+    fetches newly exposed tiles.
+    
+    Args:
+        z: Zoom level
+        x: Tile column
+        y: Tile row
         
+    Returns:
+        Properties located inside the tile with essential map data
+    """
+    if not 0 <= z <= 22 or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+
+    response.headers["Cache-Control"] = f"public, max-age={_MAP_TILE_BROWSER_MAX_AGE}"
+
+    cache_key = (z, x, y)
+    cached = _map_tile_cache.get(cache_key)
+    if cached is not None and cached[0] == _assets_version:
+        return cached[1]
+
+    version = _assets_version
+    min_lat, min_lng, max_lat, max_lng = _tile_bounds(z, x, y)
+    collection = get_collection()
+
+    # Tiles at z0/z1 span a hemisphere or more and use the coordinate-range fallback
+    tile_query = _bbox_query(min_lat, min_lng, max_lat, max_lng)
+
+    try:
+        cursor = collection.find(
+            tile_query,
+            {
+                "name_th": 1,
+                "asset_details_selling_price": 1,
+                "location_geo": 1,
+                "images_main_id": 1,
+                "asset_type_id": 1
+            }
+        ).limit(_MAP_TILE_MAX_RESULTS)
+        docs = await cursor.to_list(length=_MAP_TILE_MAX_RESULTS)
     except Exception as e:
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Map search error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Map tile error: {str(e)}")
+
+    results = [item for item in (serialize_doc(doc) for doc in docs) if item["coordinates"]]
+    payload = {
+        "tile": {"z": z, "x": x, "y": y},
+        "bounds": {"min_lat": min_lat, "min_lng": min_lng, "max_lat": max_lat, "max_lng": max_lng},
+        "count": len(results),
+        "truncated": len(docs) >= _MAP_TILE_MAX_RESULTS,
+        "results": results
+    }
+    _map_tile_cache.set(cache_key, (version, payload))
+    return payload
@@ -1,27 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
+from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
+from collections import defaultdict
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from middleware import get_current_user
+from utils.write_behind import WriteBehindQueue
+from utils.search_stats import (
+    ensure_guest_search_collection,
+    popular_queries,
+    rollup_query_stats
+)
 
 
 router = APIRouter(prefix="/api/search", tags=["Search"])
 
-# Get database configuration
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = "real_estate_db"
-
-_mongo_client = None
+# This will be set by main.py
 _db = None
 
 def get_db():
     """Get database instance"""
-    global _mongo_client, _db
-    if _mongo_client is None:
-        _mongo_client = AsyncIOMotorClient(MONGO_URI)
-        _db = _mongo_client[DB_NAME]
     return _db
 
 def set_database(database):
@@ -30,6 +30,83 @@ def set_database(database):
     _db = database
 
 
+SEARCH_HISTORY_LIMIT = 20
+GUEST_SEARCH_LIMIT = 100
+
+# Set by ensure_search_storage(); a capped guest log trims itself
+_guest_log_capped = False
+
+
+async def ensure_search_storage():
+    """Create the capped guest log (called from the app lifespan, before the index manifest)"""
+    global _guest_log_capped
+    _guest_log_capped = await ensure_guest_search_collection(get_db(), max_docs=GUEST_SEARCH_LIMIT)
+
+
+async def _rollup_best_effort(entries: list):
+    """
+    Add flushed searches to query_stats
+    
+    Runs after the batch is stored and never raises: a failure here must not
+    make the write-behind queue retry (and duplicate) writes that already succeeded.
+    """
+    try:
+        await rollup_query_stats(get_db(), entries)
+    except Exception as e:
+        print(f"⚠️ query_stats rollup of {len(entries)} searches skipped: {e}")
+
+
+async def _flush_search_history(events: list):
+    """Append buffered searches with one atomic $push/$slice per user"""
+    by_user = defaultdict(list)
+    for user_id, entry in events:
+        by_user[user_id].append(entry)
+
+    await get_db().users.bulk_write([
+        UpdateOne(
+            {"_id": user_id},
+            {"$push": {"searchHistory": {"$each": entries, "$slice": -SEARCH_HISTORY_LIMIT}}}
+        )
+        for user_id, entries in by_user.items()
+    ], ordered=False)
+    await _rollup_best_effort([entry for _, entry in events])
+
+
+async def _flush_guest_searches(entries: list):
+    """Insert buffered guest searches and roll them up into query_stats"""
+    collection = get_db().guest_searches
+    # Copies: insert_many sets _id on its arguments, and a retried batch must not reuse them
+    await collection.insert_many([dict(entry) for entry in entries], ordered=False)
+
+    if not _guest_log_capped:
+        # Legacy uncapped log: drop everything older than the GUEST_SEARCH_LIMIT-th newest entry
+        boundary = await collection.find({}, {"timestamp": 1}).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).skip(GUEST_SEARCH_LIMIT - 1).limit(1).to_list(length=1)
+        if boundary:
+            oldest_kept = boundary[0]
+            await collection.delete_many({"$or": [
+                {"timestamp": {"$lt": oldest_kept["timestamp"]}},
+                {"timestamp": oldest_kept["timestamp"], "_id": {"$lt": oldest_kept["_id"]}}
+            ]})
+
+    await _rollup_best_effort(entries)
+
+
+# Write-behind queues, started/drained by the app lifespan
+_FLUSH_INTERVAL = float(os.getenv("SEARCH_LOG_FLUSH_SECONDS", "1.0"))
+_FLUSH_BATCH = int(os.getenv("SEARCH_LOG_FLUSH_BATCH", "500"))
+
+search_history_queue = WriteBehindQueue(
+    "search history", _flush_search_history,
+    max_batch=_FLUSH_BATCH, flush_interval=_FLUSH_INTERVAL
+)
+guest_search_queue = WriteBehindQueue(
+    "guest searches", _flush_guest_searches,
+    max_batch=_FLUSH_BATCH, flush_interval=_FLUSH_INTERVAL
+)
+
+
 class SearchRequest(BaseModel):
     """Search request schema"""
     query: str
@@ -41,6 +118,19 @@ class SearchResponse(BaseModel):
     message: str = None
 
 
+class PopularQuery(BaseModel):
+    """Popular query item schema"""
+    query: str
+    count: int
+    lastSeen: Optional[datetime] = None
+
+
+class PopularQueriesResponse(BaseModel):
+    """Popular queries response schema"""
+    success: bool
+    queries: List[PopularQuery] = []
+
+
 @router.post("/save", response_model=SearchResponse)
 async def save_search(
     request: SearchRequest,
@@ -57,33 +147,11 @@ async def save_search(
         Success response
     """
     try:
-        db = get_db()
-        user_id = current_user["_id"]
-        
-        # Get current user data
-        user = await db.users.find_one({"_id": user_id})
-        
-        print(f"🔍 Before - Length: {len(user.get('searchHistory', []))}")
-        
-        # Get current search history
-        search_history = user.get("searchHistory", [])
-        
-        # Add new search
-        search_history.append({
-            "query": request.query,
-            "timestamp": datetime.utcnow()
-        })
-        
-        # Keep only latest 20 searches
-        latest_searches = search_history[-20:]
-        
-        # Update user with new search history
-        await db.users.update_one(
-            {"_id": user_id},
-            {"$set": {"searchHistory": latest_searches}}
-        )
-        
-        print(f"✅ After - Length: {len(latest_searches)}")
+        # Buffered; written with $push/$slice by the write-behind queue
+        await search_history_queue.put((
+            current_user["_id"],
+            {"query": request.query, "timestamp": datetime.utcnow()}
+        ))
         
         return SearchResponse(success=True)
         
@@ -107,26 +175,12 @@ async def guest_search(request: SearchRequest):
         Success response
     """
     try:
-        db = get_db()
-        
-        # Create guest search record
-        await db.guest_searches.insert_one({
+        # Buffered; inserted and trimmed in batches by the write-behind queue
+        await guest_search_queue.put({
             "query": request.query,
             "timestamp": datetime.utcnow()
         })
         
-        # Count total guest searches
-        count = await db.guest_searches.count_documents({})
-        
-        # If more than 100, delete oldest
-        if count > 100:
-            # Find oldest records
-            oldest = await db.guest_searches.find().sort("timestamp", 1).limit(count - 100).to_list(length=None)
-            ids_to_delete = [doc["_id"] for doc in oldest]
-            
-            # Delete old records
-            await db.guest_searches.delete_many({"_id": {"$in": ids_to_delete}})
-        
         return SearchResponse(success=True)
         
     except Exception as error:
@@ -134,4 +188,28 @@ async def guest_search(request: SearchRequest):
         return SearchResponse(
             success=False,
             message=str(error)
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/popular", response_model=PopularQueriesResponse)
+async def get_popular_queries(
+    limit: int = Query(10, ge=1, le=100, description="จำนวนคำค้นหา"),
+    hours: Optional[int] = Query(None, ge=1, le=24 * 14, description="นับเฉพาะ N ชั่วโมงล่าสุด")
+):
+    """
+    Most searched queries from the query_stats rollups
+    
+    Args:
+        limit: Number of queries to return
+        hours: Only count the last N hours (all time when omitted)
+        
+    Returns:
+        Popular queries ordered by search count
+    """
+    try:
+        queries = await popular_queries(get_db(), limit=limit, hours=hours)
+        return PopularQueriesResponse(success=True, queries=queries)
+        
+    except Exception as error:
+        print(f"❌ Error: {error}")
+        return PopularQueriesResponse(success=False, queries=[])
\ No newline at end of file
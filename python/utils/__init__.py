@@ -1,16 +1,28 @@
-from utils.auth import (
-    create_access_token,
-    verify_token,
-    hash_password,
-    verify_password
-)
-from utils.validators import is_valid_email, is_strong_password
+# Re-exports resolve on first access, so importing any utils submodule
+# (utils.cache, utils.startup, ...) does not load the auth stack
+_EXPORTS = {
+    "create_access_token": "utils.auth",
+    "decode_token": "utils.auth",
+    "verify_token": "utils.auth",
+    "hash_password": "utils.auth",
+    "verify_password": "utils.auth",
+    "hash_password_async": "utils.auth",
+    "verify_password_async": "utils.auth",
+    "password_pool": "utils.auth",
+    "PasswordPoolBusy": "utils.password_pool",
+    "is_valid_email": "utils.validators",
+    "is_strong_password": "utils.validators"
+}
 
-__all__ = [
-    "create_access_token",
-    "verify_token", 
-    "hash_password",
-    "verify_password",
-    "is_valid_email",
-    "is_strong_password"
-]
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'utils' has no attribute {name!r}")
+
+    import importlib
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
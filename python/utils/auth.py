@@ -1,8 +1,8 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 import os
+from utils.lazy import LazyObject
+from utils.password_pool import PasswordHashPool
 
 
 # Get configuration from environment
@@ -10,11 +10,24 @@ JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-this")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_DAYS = int(os.getenv("ACCESS_TOKEN_EXPIRE_DAYS", "7"))
 
-# Password hashing context - ใช้ argon2 แทน bcrypt
-pwd_context = CryptContext(
-    schemes=["argon2", "bcrypt"], 
-    deprecated="auto",
-    argon2__rounds=2
+def _create_pwd_context():
+    from passlib.context import CryptContext
+
+    # Password hashing context - ใช้ argon2 แทน bcrypt
+    return CryptContext(
+        schemes=["argon2", "bcrypt"], 
+        deprecated="auto",
+        argon2__rounds=2
+    )
+
+
+# passlib (and jose below) load on first use, not when the app imports utils
+pwd_context = LazyObject("passlib", _create_pwd_context)
+
+# Hashing runs off the event loop on a bounded pool (excess requests are shed)
+password_pool = PasswordHashPool(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_queue=int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
 )
 
 
@@ -28,6 +41,8 @@ def create_access_token(user_id: str) -> str:
     Returns:
         JWT token string
     """
+    from jose import jwt
+
     expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
     to_encode = {
         "id": user_id,
@@ -41,28 +56,45 @@ def create_access_token(user_id: str) -> str:
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
+def decode_token(token: str) -> Optional[dict]:
     """
-    Verify JWT token and extract user ID
+    Verify JWT token and return its claims
     
     Args:
         token: JWT token string
         
     Returns:
-        User ID if valid, None otherwise
+        Token payload if valid, None otherwise
     """
+    from jose import JWTError, jwt
+
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token, 
             JWT_SECRET, 
             algorithms=[JWT_ALGORITHM]
         )
-        user_id: str = payload.get("id")
-        return user_id
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> Optional[str]:
+    """
+    Verify JWT token and extract user ID
+    
+    Args:
+        token: JWT token string
+        
+    Returns:
+        User ID if valid, None otherwise
+    """
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    user_id: str = payload.get("id")
+    return user_id
+
+
 def hash_password(password: str) -> str:
     """
     Hash password using argon2 (more secure than bcrypt)
@@ -87,4 +119,37 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash password on the password pool without blocking the event loop
+    
+    Args:
+        password: Plain text password
+        
+    Returns:
+        Hashed password
+        
+    Raises:
+        PasswordPoolBusy: If too many hashes are already pending
+    """
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify password on the password pool without blocking the event loop
+    
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password from database
+        
+    Returns:
+        True if password matches, False otherwise
+        
+    Raises:
+        PasswordPoolBusy: If too many hashes are already pending
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
\ No newline at end of file
@@ -0,0 +1,173 @@
+import hashlib
+import time
+import unicodedata
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from bson import Binary
+
+from utils.cache import TTLCache
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before embedding/caching (NFC, collapsed whitespace, lowercase)"""
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split()).lower()
+
+
+def cache_key(model: str, text: str) -> str:
+    """Build a stable cache key from model name + normalized text"""
+    digest = hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+def vector_to_bytes(vector) -> bytes:
+    """Pack a vector as compact float32 bytes"""
+    return array("f", vector).tobytes()
+
+
+def bytes_to_vector(data: bytes) -> tuple:
+    """Unpack float32 bytes into a tuple of floats"""
+    return tuple(array("f", data))
+
+
+class InMemoryEmbeddingStore:
+    """In-memory stand-in for the shared (L2) embedding store"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._data: Dict[str, tuple] = {}
+
+    async def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        now = time.monotonic()
+        found = {}
+        for key in keys:
+            entry = self._data.get(key)
+            if entry and entry[1] > now:
+                found[key] = entry[0]
+        return found
+
+    async def put_many(self, items: Dict[str, bytes], model: str):
+        expires_at = time.monotonic() + self.ttl_seconds
+        for key, data in items.items():
+            self._data[key] = (data, expires_at)
+
+
+class MongoEmbeddingStore:
+    """Mongo-backed shared (L2) embedding store; its TTL index is declared in utils/indexes.py"""
+
+    def __init__(self, collection, ttl_seconds: float):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        # Documents past their TTL may linger until the TTL monitor runs
+        min_created = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        cursor = self.collection.find(
+            {"_id": {"$in": keys}, "createdAt": {"$gte": min_created}},
+            {"vector": 1}
+        )
+        docs = await cursor.to_list(length=len(keys))
+        return {doc["_id"]: bytes(doc["vector"]) for doc in docs}
+
+    async def put_many(self, items: Dict[str, bytes], model: str):
+        from pymongo import UpdateOne
+
+        now = datetime.utcnow()
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": key},
+                    {"$set": {"vector": Binary(data), "model": model, "createdAt": now}},
+                    upsert=True
+                )
+                for key, data in items.items()
+            ],
+            ordered=False
+        )
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: in-process L1 + shared L2 store"""
+
+    def __init__(self, model: str, store=None, l1_size: int = 1024):
+        """
+        Args:
+            model: Embedding model name (part of every cache key)
+            store: L2 store (MongoEmbeddingStore / InMemoryEmbeddingStore), optional
+            l1_size: Maximum number of vectors kept in process
+        """
+        self.model = model
+        self.store = store
+        self.l1 = TTLCache(maxsize=l1_size)
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+
+    def key(self, text: str) -> str:
+        return cache_key(self.model, text)
+
+    async def get_many(self, texts: List[str]) -> Dict[str, tuple]:
+        """
+        Look up embeddings for texts in L1, then L2
+
+        Returns:
+            Mapping of text -> embedding for every text found
+        """
+        found = {}
+        l2_lookup = {}
+        for text in texts:
+            key = self.key(text)
+            vector = self.l1.get(key)
+            if vector is not None:
+                found[text] = vector
+            else:
+                l2_lookup[key] = text
+
+        if l2_lookup and self.store is not None:
+            try:
+                stored = await self.store.get_many(list(l2_lookup))
+            except Exception as e:
+                print(f"⚠️ Embedding cache (L2) read error: {e}")
+                self.l2_errors += 1
+                stored = {}
+
+            for key, text in l2_lookup.items():
+                if key in stored:
+                    vector = bytes_to_vector(stored[key])
+                    self.l1.set(key, vector)
+                    found[text] = vector
+                    self.l2_hits += 1
+                else:
+                    self.l2_misses += 1
+
+        return found
+
+    async def put_many(self, vectors: Dict[str, tuple]):
+        """Store text -> embedding pairs in both tiers, entry by entry"""
+        packed = {}
+        for text, vector in vectors.items():
+            key = self.key(text)
+            self.l1.set(key, vector)
+            packed[key] = vector_to_bytes(vector)
+
+        if packed and self.store is not None:
+            try:
+                await self.store.put_many(packed, self.model)
+            except Exception as e:
+                print(f"⚠️ Embedding cache (L2) write error: {e}")
+                self.l2_errors += 1
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for both tiers"""
+        return {
+            "model": self.model,
+            "l1": self.l1.stats(),
+            "l2": {
+                "backend": type(self.store).__name__ if self.store is not None else None,
+                "hits": self.l2_hits,
+                "misses": self.l2_misses,
+                "errors": self.l2_errors
+            }
+        }
@@ -0,0 +1,69 @@
+"""
+Favorites storage: one document per (user, property) in the `favorites` collection
+
+    {"userId": ObjectId, "propertyId": str, "addedAt": datetime}
+
+A unique (userId, propertyId) index makes adds idempotent and checks a point
+lookup; (userId, addedAt) serves the paginated list (see utils/indexes.py).
+
+Older accounts keep favorites embedded in `users.favorites`. Move them with:
+    python -m utils.favorites
+"""
+FAVORITES_COLLECTION = "favorites"
+
+
+async def migrate_embedded_favorites(db, batch_size: int = 500) -> int:
+    """
+    Copy favorites embedded in user documents into the favorites collection
+
+    Each user's array is removed once its items are stored. Safe to re-run.
+
+    Args:
+        db: Database instance (Motor)
+        batch_size: Number of upserts per bulk_write
+
+    Returns:
+        Number of favorites inserted
+    """
+    from datetime import datetime
+    from pymongo import UpdateOne
+
+    collection = db[FAVORITES_COLLECTION]
+    cursor = db.users.find({"favorites.0": {"$exists": True}}, {"favorites": 1})
+
+    inserted = 0
+    async for user in cursor:
+        operations = [
+            UpdateOne(
+                {"userId": user["_id"], "propertyId": fav["propertyId"]},
+                {"$setOnInsert": {"addedAt": fav.get("addedAt") or datetime.utcnow()}},
+                upsert=True
+            )
+            for fav in user.get("favorites", [])
+            if fav.get("propertyId")
+        ]
+        for start in range(0, len(operations), batch_size):
+            result = await collection.bulk_write(operations[start:start + batch_size], ordered=False)
+            inserted += result.upserted_count
+
+        await db.users.update_one({"_id": user["_id"]}, {"$unset": {"favorites": ""}})
+
+    return inserted
+
+
+if __name__ == "__main__":
+    import asyncio
+    import database
+    from utils.indexes import ensure_indexes
+
+    async def _main():
+        database.connect()
+        try:
+            db = database.get_db()
+            await ensure_indexes(db, collections=[FAVORITES_COLLECTION])
+            count = await migrate_embedded_favorites(db)
+            print(f"✅ Migrated {count} embedded favorites")
+        finally:
+            database.close()
+
+    asyncio.run(_main())
@@ -0,0 +1,332 @@
+"""
+Index manifest and query-plan report
+
+Every index the queries rely on is declared in `build_manifest()`. ensure_indexes()
+creates missing ones and updates TTLs that changed, and is safe to run on every
+startup. explain_hot_queries() runs explain() on the hot query shapes and flags
+collection scans and missing indexes.
+
+    python -m utils.indexes              # ensure indexes (incl. Atlas vector_index)
+    python -m utils.indexes --explain    # ... then print the query-plan report (exit 1 on problems)
+    python -m utils.indexes --check      # query-plan report only
+"""
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.favorites import FAVORITES_COLLECTION
+from utils.numeric_fields import SHADOW_FIELDS
+from utils.search_stats import (
+    GUEST_SEARCHES_COLLECTION,
+    QUERY_STATS_COLLECTION,
+    QUERY_STATS_HOURLY_COLLECTION,
+    ensure_guest_search_collection
+)
+
+ASSETS_COLLECTION = "assets"
+EMBEDDING_CACHE_COLLECTION = "embedding_cache"
+VECTOR_INDEX_NAME = "vector_index"
+VECTOR_DIMENSIONS = 768
+
+# IndexOptionsConflict / IndexKeySpecsConflict
+_INDEX_CONFLICT_CODES = (85, 86)
+
+
+@dataclass
+class IndexSpec:
+    """One index the application relies on"""
+    collection: str
+    keys: List[Tuple[str, object]]
+    name: str
+    options: Dict = field(default_factory=dict)
+
+
+def build_manifest(
+    embedding_ttl_seconds: Optional[int] = None,
+    hourly_retention_days: Optional[int] = None
+) -> List[IndexSpec]:
+    """
+    Declare every index the queries rely on
+
+    Args:
+        embedding_ttl_seconds: embedding_cache TTL (default: EMBED_CACHE_TTL_DAYS)
+        hourly_retention_days: query_stats_hourly TTL (default: QUERY_STATS_HOURLY_RETENTION_DAYS)
+    """
+    if embedding_ttl_seconds is None:
+        embedding_ttl_seconds = int(float(os.getenv("EMBED_CACHE_TTL_DAYS", "30")) * 86400)
+    if hourly_retention_days is None:
+        hourly_retention_days = int(os.getenv("QUERY_STATS_HOURLY_RETENTION_DAYS", "14"))
+
+    return [
+        # login / register
+        IndexSpec("users", [("email", 1)], "email_unique", {"unique": True}),
+        # legacy (uncapped) guest log trim
+        IndexSpec(GUEST_SEARCHES_COLLECTION, [("timestamp", -1), ("_id", -1)], "timestamp_desc"),
+        # map_search ($geoNear), map_clusters / map_tiles ($geoWithin)
+        IndexSpec(ASSETS_COLLECTION, [("location_geo", "2dsphere")], "location_geo_2dsphere"),
+        # favorites: idempotent add / check, paginated list
+        IndexSpec(FAVORITES_COLLECTION, [("userId", 1), ("propertyId", 1)], "userId_propertyId_unique", {"unique": True}),
+        IndexSpec(FAVORITES_COLLECTION, [("userId", 1), ("addedAt", -1), ("_id", -1)], "userId_addedAt"),
+        # popular queries
+        IndexSpec(QUERY_STATS_COLLECTION, [("count", -1)], "count_desc"),
+        IndexSpec(QUERY_STATS_HOURLY_COLLECTION, [("query", 1), ("hour", 1)], "query_hour_unique", {"unique": True}),
+        IndexSpec(QUERY_STATS_HOURLY_COLLECTION, [("hour", 1)], "hour_ttl",
+                  {"expireAfterSeconds": hourly_retention_days * 86400}),
+        # shared embedding cache
+        IndexSpec(EMBEDDING_CACHE_COLLECTION, [("createdAt", 1)], "embedding_cache_ttl",
+                  {"expireAfterSeconds": embedding_ttl_seconds}),
+    ]
+
+
+def vector_index_definition() -> dict:
+    """Atlas Vector Search definition of vector_index (filter paths used by $vectorSearch.filter)"""
+    return {
+        "fields": [
+            {"type": "vector", "path": "asset_vector", "numDimensions": VECTOR_DIMENSIONS, "similarity": "cosine"},
+            {"type": "filter", "path": "asset_type_id"},
+            *({"type": "filter", "path": shadow} for shadow in SHADOW_FIELDS.values())
+        ]
+    }
+
+
+async def _ensure_index(db, spec: IndexSpec) -> str:
+    """Create one index; returns "ok", "updated" or an error description"""
+    from pymongo.errors import OperationFailure
+
+    collection = db[spec.collection]
+    try:
+        await collection.create_index(spec.keys, name=spec.name, **spec.options)
+        return "ok"
+    except OperationFailure as e:
+        if e.code not in _INDEX_CONFLICT_CODES or "expireAfterSeconds" not in spec.options:
+            return f"error: {e}"
+
+    # Same keys, different TTL: change the TTL in place instead of rebuilding
+    try:
+        await db.command({
+            "collMod": spec.collection,
+            "index": {"name": spec.name, "expireAfterSeconds": spec.options["expireAfterSeconds"]}
+        })
+        return "updated"
+    except OperationFailure as e:
+        return f"error: {e}"
+
+
+def _missing_vector_fields(existing_definition: dict) -> List[dict]:
+    """Fields of vector_index_definition() that an existing definition lacks or declares differently"""
+    declared = {
+        (item.get("type"), item.get("path")): item
+        for item in (existing_definition or {}).get("fields", [])
+    }
+    missing = []
+    for wanted in vector_index_definition()["fields"]:
+        current = declared.get((wanted["type"], wanted["path"]))
+        if current is None or any(current.get(key) != value for key, value in wanted.items()):
+            missing.append(wanted)
+    return missing
+
+
+async def ensure_vector_index(db) -> str:
+    """
+    Create the Atlas vector_index, or update it when it lacks manifest fields
+    (e.g. the price_num/area_num filter paths)
+
+    Returns:
+        "ok", "created", "updated", an error description, or why it was
+        skipped (e.g. not running on Atlas)
+    """
+    from pymongo.errors import OperationFailure
+
+    collection = db[ASSETS_COLLECTION]
+    try:
+        existing = await collection.aggregate([{"$listSearchIndexes": {"name": VECTOR_INDEX_NAME}}]).to_list(length=1)
+        if existing:
+            definition = existing[0].get("latestDefinition") or existing[0].get("definition") or {}
+            missing = _missing_vector_fields(definition)
+            if not missing:
+                return "ok"
+            paths = ", ".join(item["path"] for item in missing)
+            try:
+                await db.command({
+                    "updateSearchIndex": ASSETS_COLLECTION,
+                    "name": VECTOR_INDEX_NAME,
+                    "definition": vector_index_definition()
+                })
+            except OperationFailure as e:
+                return f"error: definition is missing/outdated for {paths} and the update failed: {e}"
+            print(f"⚠️ {VECTOR_INDEX_NAME} updated ({paths}); filtered searches work once Atlas finishes rebuilding it")
+            return "updated"
+        await db.command({
+            "createSearchIndexes": ASSETS_COLLECTION,
+            "indexes": [{
+                "name": VECTOR_INDEX_NAME,
+                "type": "vectorSearch",
+                "definition": vector_index_definition()
+            }]
+        })
+        return "created"
+    except OperationFailure as e:
+        return f"skipped (Atlas Search unavailable: {e.details.get('errmsg', e) if e.details else e})"
+
+
+async def ensure_indexes(db, collections: Optional[Sequence[str]] = None, include_vector_index: bool = False) -> Dict[str, str]:
+    """
+    Create every manifest index (idempotent)
+
+    Args:
+        db: Database instance (Motor)
+        collections: Only ensure indexes of these collections (default: all)
+        include_vector_index: Also create the Atlas vector_index
+
+    Returns:
+        Mapping of "collection.index" -> "ok" / "updated" / error description
+    """
+    results = {}
+    specs = [spec for spec in build_manifest() if collections is None or spec.collection in collections]
+
+    # The guest log must exist as a capped collection before an index implicitly creates it
+    if any(spec.collection == GUEST_SEARCHES_COLLECTION for spec in specs):
+        await ensure_guest_search_collection(db)
+
+    for spec in specs:
+        results[f"{spec.collection}.{spec.name}"] = await _ensure_index(db, spec)
+
+    if include_vector_index and (collections is None or ASSETS_COLLECTION in collections):
+        results[f"{ASSETS_COLLECTION}.{VECTOR_INDEX_NAME}"] = await ensure_vector_index(db)
+
+    for name, status in results.items():
+        if status not in ("ok", "created", "updated"):
+            print(f"⚠️ Index {name}: {status}")
+    return results
+
+
+# ==================== Query-plan report ====================
+
+def _hot_queries() -> List[dict]:
+    """Representative shapes of the hot queries (values are placeholders)"""
+    from datetime import datetime
+    from bson import ObjectId
+
+    user_id = ObjectId()
+    bangkok = [100.5018, 13.7563]
+    return [
+        {"name": "login", "collection": "users", "find": {"email": "explain@example.com"}},
+        {"name": "favorites check", "collection": FAVORITES_COLLECTION,
+         "find": {"userId": user_id, "propertyId": "0"}},
+        {"name": "favorites list", "collection": FAVORITES_COLLECTION,
+         "find": {"userId": user_id}, "sort": [("addedAt", -1), ("_id", -1)], "limit": 101},
+        {"name": "guest trim", "collection": GUEST_SEARCHES_COLLECTION,
+         "find": {}, "sort": [("timestamp", -1), ("_id", -1)], "skip": 99, "limit": 1},
+        {"name": "map search", "collection": ASSETS_COLLECTION, "pipeline": [
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": bangkok},
+                "distanceField": "distance",
+                "maxDistance": 5000,
+                "spherical": True,
+                "query": {"location_geo": {"$exists": True, "$ne": None}}
+            }},
+            {"$limit": 50}
+        ]},
+        {"name": "map tiles", "collection": ASSETS_COLLECTION, "find": {
+            "location_geo": {"$geoWithin": {"$geometry": {
+                "type": "Polygon",
+                "coordinates": [[[100.4, 13.7], [100.6, 13.7], [100.6, 13.8], [100.4, 13.8], [100.4, 13.7]]]
+            }}}
+        }, "limit": 500},
+        {"name": "popular queries", "collection": QUERY_STATS_HOURLY_COLLECTION,
+         "find": {"hour": {"$gte": datetime.utcnow()}}},
+    ]
+
+
+def _plan_stages(node) -> List[str]:
+    """Collect every plan stage name in an explain() document"""
+    stages = []
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        for key, value in node.items():
+            if key in ("rejectedPlans", "executionStats"):
+                continue
+            stages.extend(_plan_stages(value))
+    elif isinstance(node, list):
+        for item in node:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_query(db, query: dict) -> dict:
+    """
+    Explain one query shape
+
+    Returns:
+        {"name", "collection", "stages", "status"} where status is "ok",
+        "COLLSCAN", "in-memory SORT" or an error description
+    """
+    from pymongo.errors import OperationFailure
+
+    if "pipeline" in query:
+        command = {"aggregate": query["collection"], "pipeline": query["pipeline"], "cursor": {}}
+    else:
+        command = {"find": query["collection"], "filter": query["find"]}
+        if query.get("sort"):
+            command["sort"] = dict(query["sort"])
+        for option in ("skip", "limit"):
+            if query.get(option):
+                command[option] = query[option]
+
+    try:
+        plan = await db.command("explain", command, verbosity="queryPlanner")
+    except OperationFailure as e:
+        # e.g. $geoNear without a 2dsphere index fails instead of scanning
+        return {"name": query["name"], "collection": query["collection"], "stages": [], "status": f"error: {e}"}
+
+    stages = list(dict.fromkeys(_plan_stages(plan)))
+    status = "ok"
+    if "COLLSCAN" in stages:
+        status = "COLLSCAN"
+    elif "SORT" in stages:
+        status = "in-memory SORT"
+    return {"name": query["name"], "collection": query["collection"], "stages": stages, "status": status}
+
+
+async def explain_hot_queries(db) -> List[dict]:
+    """
+    Run explain() on every hot query shape and warn about collection scans
+
+    Returns:
+        One report entry per query (see explain_query)
+    """
+    report = [await explain_query(db, query) for query in _hot_queries()]
+    for entry in report:
+        if entry["status"] != "ok":
+            print(f"⚠️ Query plan [{entry['name']}] on {entry['collection']}: {entry['status']}")
+    return report
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+    import database
+
+    async def _main() -> int:
+        database.connect()
+        try:
+            db = database.get_db()
+            if "--check" not in sys.argv:
+                results = await ensure_indexes(db, include_vector_index=True)
+                for name, status in results.items():
+                    print(f"{'✅' if status in ('ok', 'created', 'updated') else '❌'} {name}: {status}")
+
+            if "--explain" not in sys.argv and "--check" not in sys.argv:
+                return 0
+
+            problems = 0
+            for entry in await explain_hot_queries(db):
+                ok = entry["status"] == "ok"
+                problems += not ok
+                print(f"{'✅' if ok else '❌'} {entry['name']:<16} {entry['collection']:<20} {' > '.join(entry['stages']) or '-'}")
+            return 1 if problems else 0
+        finally:
+            database.close()
+
+    sys.exit(asyncio.run(_main()))
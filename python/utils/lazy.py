@@ -0,0 +1,43 @@
+import threading
+import time
+from typing import Any, Callable
+
+from utils import startup
+
+
+class LazyObject:
+    """
+    Proxy that creates the wrapped object on first attribute access
+
+    Lets heavy clients (and the modules they import) stay out of cold starts while
+    callers keep using the object as if it were created eagerly. Creation is
+    thread-safe, so first use from executor threads is fine.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        """
+        Args:
+            name: Name reported in the startup profile
+            factory: Zero-argument function creating the object
+        """
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        """Return the wrapped object, creating it on first call"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    self._instance = self._factory()
+                    startup.record(self._name, time.perf_counter() - started)
+        return self._instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
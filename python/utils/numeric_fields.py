@@ -0,0 +1,156 @@
+"""
+Numeric shadow fields for filterable asset attributes
+
+`asset_details_selling_price` and `asset_details_land_size` are stored as messy
+strings ("2,500,000", "35.5 ตร.ว.", ...). Range filters need real numbers inside
+$vectorSearch.filter, so every asset keeps normalized copies in `price_num` and
+`area_num`.
+
+While the app runs, the assets change-stream watcher (see
+property_routes.watch_asset_changes) recomputes them for inserted, replaced and
+updated assets via sync_shadow_fields(). Without a change stream (standalone
+mongod, WATCH_ASSET_CHANGES=false), or for changes made while the app was down,
+refresh from the command line:
+    python -m utils.numeric_fields          # only assets missing the shadow fields
+    python -m utils.numeric_fields --all    # recompute every asset
+"""
+import re
+from typing import Optional
+
+PRICE_FIELD = "asset_details_selling_price"
+AREA_FIELD = "asset_details_land_size"
+
+# Source field -> numeric shadow field
+SHADOW_FIELDS = {
+    PRICE_FIELD: "price_num",
+    AREA_FIELD: "area_num",
+}
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_number(value) -> Optional[float]:
+    """
+    Parse a messy numeric value
+
+    Args:
+        value: int/float or string such as "2,500,000 บาท"
+
+    Returns:
+        Float value, or None if no number can be extracted
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER_RE.search(value.replace(",", ""))
+        if match:
+            return float(match.group())
+    return None
+
+
+def compute_shadow_fields(doc: dict) -> dict:
+    """Return the numeric shadow fields for an asset document"""
+    return {
+        shadow: parse_number(doc.get(source))
+        for source, shadow in SHADOW_FIELDS.items()
+    }
+
+
+async def backfill_numeric_fields(collection, only_missing: bool = True, batch_size: int = 500) -> int:
+    """
+    Write price_num/area_num onto asset documents
+
+    Args:
+        collection: Assets collection (Motor)
+        only_missing: Only touch documents that lack a shadow field
+        batch_size: Number of updates per bulk_write
+
+    Returns:
+        Number of documents updated
+    """
+    from pymongo import UpdateOne
+
+    query = {}
+    if only_missing:
+        query = {"$or": [{shadow: {"$exists": False}} for shadow in SHADOW_FIELDS.values()]}
+
+    projection = {field: 1 for field in SHADOW_FIELDS}
+    cursor = collection.find(query, projection)
+
+    updated = 0
+    batch = []
+    async for doc in cursor:
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": compute_shadow_fields(doc)}))
+        if len(batch) >= batch_size:
+            result = await collection.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+
+    if batch:
+        result = await collection.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+
+    return updated
+
+
+async def sync_shadow_fields(collection, change: dict) -> bool:
+    """
+    Recompute the shadow fields of the asset touched by one change-stream event
+
+    Args:
+        collection: Assets collection (Motor)
+        change: Change event from collection.watch()
+
+    Returns:
+        True if the shadow fields were rewritten
+    """
+    operation = change.get("operationType")
+    if operation not in ("insert", "replace", "update"):
+        return False
+
+    doc = change.get("fullDocument")
+    if operation == "update":
+        description = change.get("updateDescription") or {}
+        touched = set(description.get("updatedFields") or {}) | set(description.get("removedFields") or [])
+        # Our own $set of price_num/area_num also arrives here and must not loop
+        if not any(path.split(".")[0] in SHADOW_FIELDS for path in touched):
+            return False
+        doc = None
+
+    if doc is None:
+        from pymongo import ReadPreference
+
+        projection = {field: 1 for field in [*SHADOW_FIELDS, *SHADOW_FIELDS.values()]}
+        doc = await collection.with_options(read_preference=ReadPreference.PRIMARY).find_one(
+            {"_id": change["documentKey"]["_id"]}, projection
+        )
+        if doc is None:
+            return False
+
+    shadow = compute_shadow_fields(doc)
+    if all(field in doc and doc[field] == value for field, value in shadow.items()):
+        return False
+
+    await collection.update_one({"_id": doc["_id"]}, {"$set": shadow})
+    return True
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+    import database
+
+    async def _main():
+        database.connect()
+        try:
+            count = await backfill_numeric_fields(
+                database.get_db()["assets"],
+                only_missing="--all" not in sys.argv
+            )
+            print(f"✅ Updated numeric shadow fields on {count} assets")
+        finally:
+            database.close()
+
+    asyncio.run(_main())
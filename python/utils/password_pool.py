@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password hashing queue is full"""
+
+
+class PasswordHashPool:
+    """
+    Bounded worker pool for password hashing/verification
+
+    argon2 and bcrypt release the GIL while hashing, so a small thread pool keeps
+    the event loop free. At most `max_workers + max_queue` operations may be
+    pending; further calls are shed with PasswordPoolBusy instead of queueing
+    without bound.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, window: int = 512):
+        """
+        Args:
+            max_workers: Concurrent hashing threads
+            max_queue: Operations allowed to wait for a free thread
+            window: Number of recent operations kept for latency percentiles
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_ms = deque(maxlen=window)
+        self._run_ms = deque(maxlen=window)
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run fn(*args) on the pool
+
+        Raises:
+            PasswordPoolBusy: If the queue is full
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordPoolBusy("Password hashing is busy, please retry")
+
+        self._pending += 1
+        self.peak_pending = max(self.peak_pending, self._pending)
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._wait_ms.append((started - submitted) * 1000)
+                self._run_ms.append((time.perf_counter() - started) * 1000)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+
+    @staticmethod
+    def _percentiles(samples) -> dict:
+        values = sorted(samples)
+        if not values:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "p50": round(values[len(values) // 2], 2),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            "max": round(values[-1], 2)
+        }
+
+    def stats(self) -> dict:
+        """Return saturation and latency (ms) metrics"""
+        capacity = self.max_workers + self.max_queue
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queued": max(0, self._pending - self.max_workers),
+            "saturation": round(self._pending / capacity, 4) if capacity else 0.0,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_ms": self._percentiles(self._wait_ms),
+            "hash_ms": self._percentiles(self._run_ms)
+        }
@@ -0,0 +1,233 @@
+import json
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+
+import numpy as np
+
+from utils.numeric_fields import AREA_FIELD, PRICE_FIELD, parse_number
+
+RERANK_MODES = ("gemini", "local", "hybrid")
+
+_THAI_RUN_RE = re.compile(r"[\u0e00-\u0e7f]+")
+_WORD_RE = re.compile(r"[\u0e00-\u0e7f]+|[a-z0-9]+(?:\.[0-9]+)?")
+
+try:
+    from pythainlp.tokenize import word_tokenize as _thai_word_tokenize
+except ImportError:  # optional dependency
+    _thai_word_tokenize = None
+
+
+def tokenize_thai(text: str) -> List[str]:
+    """
+    Tokenize Thai/English text for lexical scoring
+
+    Uses pythainlp word segmentation when installed; otherwise Thai runs are
+    split into character bigrams (Thai has no spaces between words) and
+    latin/digit runs are kept as lowercase words.
+    """
+    tokens = []
+    for word in _WORD_RE.findall((text or "").lower()):
+        if not _THAI_RUN_RE.fullmatch(word):
+            tokens.append(word)
+        elif _thai_word_tokenize is not None:
+            tokens.extend(t for t in _thai_word_tokenize(word, keep_whitespace=False) if t.strip())
+        elif len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def bm25_scores(query_tokens: List[str], docs_tokens: List[List[str]], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """
+    Okapi BM25 score of every document against the query
+
+    Args:
+        query_tokens: Tokenized query
+        docs_tokens: Tokenized documents (the candidate set is the corpus)
+
+    Returns:
+        Array of scores, one per document
+    """
+    n_docs = len(docs_tokens)
+    terms = list(dict.fromkeys(query_tokens))
+    if not n_docs or not terms:
+        return np.zeros(n_docs, dtype=np.float64)
+
+    counts = [Counter(tokens) for tokens in docs_tokens]
+    tf = np.array([[c.get(term, 0) for term in terms] for c in counts], dtype=np.float64)
+    doc_len = np.array([len(tokens) for tokens in docs_tokens], dtype=np.float64)
+    avg_len = doc_len.mean() or 1.0
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+    denom = tf + k1 * (1.0 - b + b * (doc_len / avg_len))[:, None]
+    return (idf * tf * (k1 + 1.0) / denom).sum(axis=1)
+
+
+@dataclass
+class RerankRequest:
+    """Everything a reranker may use to score one candidate list"""
+    kind: str
+    query: str
+    candidates: List[dict]
+    prompt: str
+    filters: Dict = field(default_factory=dict)
+
+
+class RerankDegraded(Exception):
+    """
+    Raised when a reranker could only produce fallback scores
+
+    `scores` is still usable for ordering, but must not be cached or reported
+    as a full rerank.
+    """
+
+    def __init__(self, scores: Dict[int, float], reason: str):
+        super().__init__(reason)
+        self.scores = scores
+
+
+class Reranker(ABC):
+    """Reranker interface"""
+
+    name = "base"
+
+    @abstractmethod
+    async def rerank(self, request: RerankRequest) -> Dict[int, float]:
+        """
+        Score candidates
+
+        Returns:
+            Mapping of 1-based candidate position -> relevance score
+        """
+
+
+class GeminiReranker(Reranker):
+    """LLM judge: sends the prepared prompt to Gemini"""
+
+    name = "gemini"
+
+    def __init__(self, generate: Callable[[str], Awaitable[str]]):
+        """
+        Args:
+            generate: Async function returning Gemini's JSON text for a prompt
+        """
+        self.generate = generate
+
+    async def rerank(self, request: RerankRequest) -> Dict[int, float]:
+        parsed = json.loads(await self.generate(request.prompt))
+        return {item["id"]: item["score"] for item in parsed}
+
+
+class LocalReranker(Reranker):
+    """
+    CPU reranker combining BM25 over name_th/ai_description_th, the vector
+    score and filter-match features in one vectorized scorer
+    """
+
+    name = "local"
+
+    def __init__(self, bm25_weight: float = 0.4, vector_weight: float = 0.5, filter_weight: float = 0.1):
+        self.bm25_weight = bm25_weight
+        self.vector_weight = vector_weight
+        self.filter_weight = filter_weight
+
+    @staticmethod
+    def _filter_features(candidates: List[dict], filters: Dict) -> np.ndarray:
+        """Fraction of requested filters each candidate satisfies (1.0 when none requested)"""
+        checks = []
+
+        type_ids = set(filters.get("asset_type_ids") or [])
+        if type_ids:
+            checks.append([doc.get("asset_type_id") in type_ids for doc in candidates])
+
+        for source, low, high in (
+            (PRICE_FIELD, filters.get("min_price"), filters.get("max_price")),
+            (AREA_FIELD, filters.get("min_area"), filters.get("max_area")),
+        ):
+            if low is None and high is None:
+                continue
+            values = [parse_number(doc.get(source)) for doc in candidates]
+            checks.append([
+                v is not None and (low is None or v >= low) and (high is None or v <= high)
+                for v in values
+            ])
+
+        if not checks:
+            return np.ones(len(candidates), dtype=np.float64)
+        return np.asarray(checks, dtype=np.float64).mean(axis=0)
+
+    def score(self, request: RerankRequest) -> np.ndarray:
+        """Return one score in [0, 1] per candidate"""
+        candidates = request.candidates
+        if not candidates:
+            return np.zeros(0, dtype=np.float64)
+
+        docs_tokens = [
+            tokenize_thai(f"{doc.get('name_th', '')} {(doc.get('ai_description_th') or '')[:1000]}")
+            for doc in candidates
+        ]
+        lexical = bm25_scores(tokenize_thai(request.query), docs_tokens)
+        if lexical.max() > 0:
+            lexical = lexical / lexical.max()
+
+        vector = np.array([float(doc.get("score", 0.0) or 0.0) for doc in candidates], dtype=np.float64)
+        filters = self._filter_features(candidates, request.filters)
+
+        return (
+            self.bm25_weight * lexical
+            + self.vector_weight * vector
+            + self.filter_weight * filters
+        )
+
+    async def rerank(self, request: RerankRequest) -> Dict[int, float]:
+        return {idx + 1: float(score) for idx, score in enumerate(self.score(request))}
+
+
+class HybridReranker(Reranker):
+    """
+    Blend of the local scorer and Gemini
+
+    Local scores are always computed; Gemini scores are blended in when the
+    LLM answers in time, otherwise RerankDegraded carries the local scores.
+    """
+
+    name = "hybrid"
+
+    def __init__(self, gemini: GeminiReranker, local: LocalReranker, gemini_weight: float = 0.7):
+        self.gemini = gemini
+        self.local = local
+        self.gemini_weight = gemini_weight
+
+    async def rerank(self, request: RerankRequest) -> Dict[int, float]:
+        local_scores = await self.local.rerank(request)
+        try:
+            gemini_scores = await self.gemini.rerank(request)
+        except Exception as e:
+            raise RerankDegraded(local_scores, f"Gemini unavailable: {e!r}") from e
+
+        return {
+            pos: self.gemini_weight * float(gemini_scores.get(pos, local)) + (1 - self.gemini_weight) * local
+            for pos, local in local_scores.items()
+        }
+
+
+def build_reranker(mode: str, generate: Callable[[str], Awaitable[str]]) -> Reranker:
+    """
+    Create a reranker for a mode ("gemini", "local" or "hybrid")
+
+    Args:
+        mode: Rerank mode name
+        generate: Async Gemini call used by the gemini/hybrid modes
+    """
+    if mode == "gemini":
+        return GeminiReranker(generate)
+    if mode == "local":
+        return LocalReranker()
+    if mode == "hybrid":
+        return HybridReranker(GeminiReranker(generate), LocalReranker())
+    raise ValueError(f"Unknown rerank mode: {mode} (expected one of {', '.join(RERANK_MODES)})")
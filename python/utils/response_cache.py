@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class ResponseCache:
+    """
+    Bounded async response cache with stale-while-revalidate and versioned invalidation
+
+    Every entry remembers the data version it was computed under; entries from an
+    older version are treated as misses, so bumping the version invalidates
+    everything at once. Expired entries are still served for `stale_ttl` seconds
+    while a single background task refreshes them. Concurrent misses for the same
+    key share one computation.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 60.0, stale_ttl: float = 300.0):
+        """
+        Args:
+            maxsize: Maximum number of cached responses (LRU eviction)
+            ttl: Seconds a response is fresh
+            stale_ttl: Extra seconds an expired response may be served while refreshing
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._inflight: Dict[Tuple[Hashable, int], asyncio.Task] = {}
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        version: int,
+        compute: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True
+    ) -> Any:
+        """
+        Return the cached response for key, computing it when missing or outdated
+
+        Args:
+            key: Normalized request key
+            version: Current data version
+            compute: Coroutine factory producing the response
+            should_cache: Predicate deciding whether a computed response is stored
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] == version:
+            value, created_at, _ = entry
+            age = time.monotonic() - created_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if (key, version) not in self._inflight:
+                    self.refreshes += 1
+                    task = self._start(key, version, compute, should_cache)
+                    task.add_done_callback(self._log_refresh_error)
+                return value
+
+        self.misses += 1
+        task = self._inflight.get((key, version)) or self._start(key, version, compute, should_cache)
+        return await asyncio.shield(task)
+
+    def _start(self, key, version, compute, should_cache) -> asyncio.Task:
+        task = asyncio.create_task(self._run(key, version, compute, should_cache))
+        self._inflight[(key, version)] = task
+        return task
+
+    async def _run(self, key, version, compute, should_cache) -> Any:
+        try:
+            value = await compute()
+            if should_cache(value):
+                self._entries[key] = (value, time.monotonic(), version)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop((key, version), None)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ Background cache refresh failed: {task.exception()}")
+
+    def clear(self):
+        """Drop every cached response"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters"""
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "background_refreshes": self.refreshes,
+            "hit_rate": round((self.hits + self.stale_hits) / total, 4) if total else 0.0
+        }
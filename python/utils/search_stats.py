@@ -0,0 +1,145 @@
+"""
+Bounded guest search log and popular-query rollups
+
+`guest_searches` is a capped collection holding the newest entries, so MongoDB
+trims it on insert. Every flushed batch of searches is also rolled up into:
+
+    query_stats         {_id: normalized query, query, count, lastSeen}
+    query_stats_hourly  {query: normalized query, hour, count}   (TTL on hour)
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from utils.embedding_cache import normalize_text
+
+GUEST_SEARCHES_COLLECTION = "guest_searches"
+QUERY_STATS_COLLECTION = "query_stats"
+QUERY_STATS_HOURLY_COLLECTION = "query_stats_hourly"
+
+_MAX_QUERY_KEY_LENGTH = 200
+
+# Server error code when create_collection races another worker
+_NAMESPACE_EXISTS = 48
+
+
+def query_key(query: str) -> str:
+    """Normalized form used to group identical queries"""
+    return normalize_text(query)[:_MAX_QUERY_KEY_LENGTH]
+
+
+async def ensure_guest_search_collection(db, max_docs: int = 100, size_bytes: int = 1024 * 1024) -> bool:
+    """
+    Create guest_searches as a capped collection when it does not exist yet
+
+    Args:
+        db: Database instance (Motor)
+        max_docs: Number of newest entries kept
+        size_bytes: Capped collection size limit
+
+    Returns:
+        True if the collection is capped (trimming is free), False if an older
+        uncapped collection is in place and must still be trimmed by the app
+    """
+    from pymongo.errors import CollectionInvalid, OperationFailure
+
+    names = await db.list_collection_names(filter={"name": GUEST_SEARCHES_COLLECTION})
+    if not names:
+        try:
+            await db.create_collection(GUEST_SEARCHES_COLLECTION, capped=True, size=size_bytes, max=max_docs)
+            return True
+        except CollectionInvalid:
+            # Another worker created it between the check and the create
+            pass
+        except OperationFailure as e:
+            if e.code != _NAMESPACE_EXISTS:
+                raise
+
+    options = await db[GUEST_SEARCHES_COLLECTION].options()
+    if not options.get("capped"):
+        print(
+            f"⚠️ {GUEST_SEARCHES_COLLECTION} is not capped; drop it to let the app "
+            f"recreate it as a capped collection (max {max_docs})"
+        )
+        return False
+    return True
+
+
+async def rollup_query_stats(db, entries: List[dict]):
+    """
+    Add a batch of search events to the query_stats aggregates
+
+    Args:
+        db: Database instance (Motor)
+        entries: Search events ({"query", "timestamp"})
+    """
+    from pymongo import UpdateOne
+
+    totals = Counter()
+    hourly = Counter()
+    last_seen = {}
+    display = {}
+    for entry in entries:
+        key = query_key(entry.get("query"))
+        if not key:
+            continue
+        timestamp = entry["timestamp"]
+        totals[key] += 1
+        hourly[(key, timestamp.replace(minute=0, second=0, microsecond=0))] += 1
+        if key not in last_seen or timestamp > last_seen[key]:
+            last_seen[key] = timestamp
+            display[key] = entry["query"]
+
+    if not totals:
+        return
+
+    await db[QUERY_STATS_COLLECTION].bulk_write([
+        UpdateOne(
+            {"_id": key},
+            {
+                "$inc": {"count": count},
+                "$max": {"lastSeen": last_seen[key]},
+                "$set": {"query": display[key]}
+            },
+            upsert=True
+        )
+        for key, count in totals.items()
+    ], ordered=False)
+
+    await db[QUERY_STATS_HOURLY_COLLECTION].bulk_write([
+        UpdateOne({"query": key, "hour": hour}, {"$inc": {"count": count}}, upsert=True)
+        for (key, hour), count in hourly.items()
+    ], ordered=False)
+
+
+async def popular_queries(db, limit: int = 10, hours: Optional[int] = None) -> List[dict]:
+    """
+    Most searched queries
+
+    Args:
+        db: Database instance (Motor)
+        limit: Number of queries to return
+        hours: Only count the last N hours (all time when None)
+
+    Returns:
+        List of {"query", "count", "lastSeen"} ordered by count
+    """
+    if hours is None:
+        cursor = db[QUERY_STATS_COLLECTION].find({}, {"_id": 0, "query": 1, "count": 1, "lastSeen": 1})
+        return await cursor.sort("count", -1).limit(limit).to_list(length=limit)
+
+    since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    pipeline = [
+        {"$match": {"hour": {"$gte": since}}},
+        {"$group": {"_id": "$query", "count": {"$sum": "$count"}, "lastSeen": {"$max": "$hour"}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+        {"$lookup": {"from": QUERY_STATS_COLLECTION, "localField": "_id", "foreignField": "_id", "as": "stats"}},
+        {"$project": {
+            "_id": 0,
+            "query": {"$ifNull": [{"$arrayElemAt": ["$stats.query", 0]}, "$_id"]},
+            "count": 1,
+            "lastSeen": {"$ifNull": [{"$arrayElemAt": ["$stats.lastSeen", 0]}, "$lastSeen"]}
+        }}
+    ]
+    return await db[QUERY_STATS_HOURLY_COLLECTION].aggregate(pipeline).to_list(length=limit)
@@ -0,0 +1,113 @@
+"""
+Cold-start profiling
+
+main.py wraps its imports and client setup in `timed()` spans, and lazily created
+clients record their init time on first use. `report()` returns the collected
+timings (served by /api/debug/startup).
+
+Per-module import times, with an optional budget for CI:
+    python -m utils.startup                    # top 25 modules by cumulative import time
+    python -m utils.startup --budget-ms 1500   # exit 1 when `import main` exceeds the budget
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+_process_started = time.perf_counter()
+_spans: List[Dict] = []
+
+
+@contextmanager
+def timed(name: str, kind: str = "import"):
+    """
+    Record how long the wrapped block takes
+
+    Args:
+        name: Span name (e.g. "routes", "gemini client")
+        kind: "import" or "init"
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started, kind)
+
+
+def record(name: str, seconds: float, kind: str = "init"):
+    """Record a span measured elsewhere"""
+    _spans.append({
+        "name": name,
+        "kind": kind,
+        "ms": round(seconds * 1000, 2),
+        "at_ms": round((time.perf_counter() - _process_started) * 1000, 2)
+    })
+
+
+def report() -> dict:
+    """Return the startup timings collected so far"""
+    totals = {}
+    for span in _spans:
+        totals[span["kind"]] = round(totals.get(span["kind"], 0.0) + span["ms"], 2)
+    return {
+        "spans": list(_spans),
+        "total_ms": totals,
+        "uptime_ms": round((time.perf_counter() - _process_started) * 1000, 2)
+    }
+
+
+def profile_imports(module: str = "main") -> List[Dict]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Per-module timings ({"module", "self_ms", "cumulative_ms"}) by cumulative time
+    """
+    import os
+    import subprocess
+    import sys
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Per-module import time report")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for row in rows[:args.top]:
+        print(f"{row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}  {row['module']}")
+
+    total = next((row["cumulative_ms"] for row in rows if row["module"] == args.module), 0.0)
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"❌ import {args.module} took {total:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        sys.exit(1)
+    print(f"✅ import {args.module} took {total:.0f} ms")
@@ -1,6 +1,3 @@
-from email_validator import validate_email, EmailNotValidError
-
-
 def is_valid_email(email: str) -> bool:
     """
     Validate email format
@@ -11,6 +8,8 @@ def is_valid_email(email: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
+    from email_validator import validate_email, EmailNotValidError
+
     try:
         validate_email(email)
         return True
@@ -0,0 +1,222 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+def _metadata_column(values: Sequence) -> np.ndarray:
+    """
+    Store one metadata field as a typed array so filters compare vectorized
+
+    All-integer fields become int64, other numeric fields float64 with NaN for
+    missing values; anything else stays an object array.
+    """
+    present = [v for v in values if v is not None]
+    if not all(_is_number(v) for v in present):
+        return np.asarray(values, dtype=object)
+    if len(present) == len(values) and all(isinstance(v, (int, np.integer)) for v in present):
+        return np.asarray(values, dtype=np.int64)
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+class IVFVectorIndex:
+    """
+    In-process approximate nearest neighbour index (inverted file over k-means cells)
+
+    Vectors are L2-normalized and scored by cosine similarity. Scores are reported
+    on Atlas' cosine scale, (1 + cosine) / 2, so results are interchangeable with
+    $vectorSearch's vectorSearchScore. Small collections are searched exactly.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        exact_threshold: int = 2000,
+        kmeans_iterations: int = 10,
+        seed: int = 42
+    ):
+        """
+        Args:
+            n_lists: Number of k-means cells (default: sqrt of collection size)
+            n_probe: Minimum number of cells scanned per query
+            exact_threshold: Below this many vectors the index does exact search
+            kmeans_iterations: Lloyd iterations used to train the cells
+            seed: Random seed for centroid initialization
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.exact_threshold = exact_threshold
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+
+        self.ids: list = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.metadata: Dict[str, np.ndarray] = {}
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.lists: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self, ids: Sequence, vectors: Sequence, metadata: Optional[Dict[str, Sequence]] = None):
+        """
+        Build the index
+
+        Args:
+            ids: Document ids, one per vector
+            vectors: Embedding vectors (all with the same dimension)
+            metadata: Per-document filterable fields, e.g. {"asset_type_id": [...]}
+        """
+        self.ids = list(ids)
+        self.vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32)) if self.ids else np.zeros((0, 0), dtype=np.float32)
+        self.metadata = {
+            field: _metadata_column(values)
+            for field, values in (metadata or {}).items()
+        }
+
+        n = len(self.ids)
+        if n <= self.exact_threshold:
+            self.centroids = self.vectors.mean(axis=0, keepdims=True) if n else self.vectors
+            self.lists = [np.arange(n)] if n else []
+            return
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        self.centroids, assignments = self._kmeans(n_lists)
+        self.lists = [np.flatnonzero(assignments == cell) for cell in range(len(self.centroids))]
+
+    def _kmeans(self, n_lists: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Spherical k-means over the normalized vectors"""
+        rng = np.random.default_rng(self.seed)
+        centroids = self.vectors[rng.choice(len(self.vectors), size=n_lists, replace=False)].copy()
+        assignments = np.zeros(len(self.vectors), dtype=np.int64)
+
+        for _ in range(self.kmeans_iterations):
+            assignments = np.argmax(self.vectors @ centroids.T, axis=1)
+            for cell in range(n_lists):
+                members = self.vectors[assignments == cell]
+                if len(members):
+                    centroids[cell] = members.mean(axis=0)
+            centroids = _normalize_rows(centroids)
+
+        return centroids, np.argmax(self.vectors @ centroids.T, axis=1)
+
+    def _filter_mask(self, filter_spec: Optional[dict]) -> Optional[np.ndarray]:
+        """
+        Evaluate a $vectorSearch-style pre-filter against the stored metadata
+
+        Supports field equality, $in, $gt/$gte/$lt/$lte and $and.
+        """
+        if not filter_spec:
+            return None
+
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, condition in filter_spec.items():
+            if field == "$and":
+                for sub_filter in condition:
+                    sub_mask = self._filter_mask(sub_filter)
+                    if sub_mask is not None:
+                        mask &= sub_mask
+                continue
+
+            values = self.metadata.get(field)
+            if values is None:
+                return np.zeros(len(self.ids), dtype=bool)
+
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+
+            numeric_column = values.dtype != object
+            for op, operand in condition.items():
+                if op == "$eq":
+                    if numeric_column:
+                        mask &= (values == operand) if _is_number(operand) else False
+                    else:
+                        mask &= np.array([v == operand for v in values], dtype=bool)
+                elif op == "$in":
+                    if numeric_column:
+                        mask &= np.isin(values, [v for v in operand if _is_number(v)])
+                    else:
+                        allowed = set(operand)
+                        mask &= np.array([v in allowed for v in values], dtype=bool)
+                elif op in ("$gt", "$gte", "$lt", "$lte"):
+                    if numeric_column:
+                        numeric = values
+                    else:
+                        numeric = np.array([v if _is_number(v) else np.nan for v in values], dtype=np.float64)
+                    with np.errstate(invalid="ignore"):
+                        if op == "$gt":
+                            mask &= numeric > operand
+                        elif op == "$gte":
+                            mask &= numeric >= operand
+                        elif op == "$lt":
+                            mask &= numeric < operand
+                        else:
+                            mask &= numeric <= operand
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+        return mask
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        limit: int,
+        num_candidates: int = 100,
+        filter_spec: Optional[dict] = None
+    ) -> List[Tuple[object, float]]:
+        """
+        Find the nearest documents to query_vector
+
+        Args:
+            query_vector: Query embedding
+            limit: Number of results to return
+            num_candidates: Minimum number of filter-matching vectors to score
+            filter_spec: Optional pre-filter (same shape as $vectorSearch.filter)
+
+        Returns:
+            List of (id, score) pairs ordered by descending score
+        """
+        if not self.ids or limit <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        mask = self._filter_mask(filter_spec)
+
+        # Probe cells nearest to the query until enough matching candidates are gathered
+        cell_order = np.argsort(-(self.centroids @ query))
+        probed = []
+        gathered = 0
+        for rank, cell in enumerate(cell_order):
+            members = self.lists[cell]
+            if mask is not None:
+                members = members[mask[members]]
+            if len(members):
+                probed.append(members)
+                gathered += len(members)
+            if rank + 1 >= self.n_probe and gathered >= num_candidates:
+                break
+
+        if not probed:
+            return []
+
+        candidates = np.concatenate(probed)
+        similarities = self.vectors[candidates] @ query
+
+        k = min(limit, len(candidates))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+
+        return [(self.ids[candidates[i]], float((1.0 + similarities[i]) / 2.0)) for i in top]
@@ -0,0 +1,142 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class WriteBehindQueue:
+    """
+    In-process write-behind buffer
+
+    Items are appended without touching the database and handed to `flush_fn` in
+    batches, either every `flush_interval` seconds or as soon as `max_batch` items
+    are waiting. A failed (or cancelled) flush puts its batch back at the head of
+    the buffer, so delivery is at-least-once; `stop()` lets a running flush finish
+    and then drains whatever is left.
+
+    When the queue is not running (e.g. the app lifespan never started it), items
+    are flushed immediately instead of being buffered.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[List[Any]], Awaitable[None]],
+        max_batch: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 50000
+    ):
+        """
+        Args:
+            name: Queue name used in logs and stats
+            flush_fn: Coroutine writing one batch of items
+            max_batch: Buffer size that triggers an early flush
+            flush_interval: Seconds between timed flushes
+            max_pending: Hard cap on buffered items; the oldest are dropped beyond it
+        """
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._buffer: List[Any] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def put(self, item: Any):
+        """Buffer an item (or write it right away when the queue is not running)"""
+        self.enqueued += 1
+        if not self.running:
+            await self.flush_fn([item])
+            self.flushed += 1
+            return
+
+        self._buffer.append(item)
+        if len(self._buffer) > self.max_pending:
+            overflow = len(self._buffer) - self.max_pending
+            del self._buffer[:overflow]
+            self.dropped += overflow
+        if len(self._buffer) >= self.max_batch:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the background flush loop"""
+        if not self.running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write everything still buffered"""
+        if self._task is not None:
+            # No cancel: a flush in progress completes (or re-queues its batch) first
+            self._stopping = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._buffer:
+            if not await self.flush():
+                print(f"❌ {self.name}: {len(self._buffer)} buffered items lost on shutdown")
+                break
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """
+        Write up to max_batch buffered items
+
+        Returns:
+            False if the write failed (the batch is kept for a retry)
+        """
+        async with self._flush_lock:
+            if not self._buffer:
+                return True
+            batch = self._buffer[:self.max_batch]
+            del self._buffer[:len(batch)]
+            try:
+                await self.flush_fn(batch)
+            except Exception as e:
+                self.failures += 1
+                self._buffer[:0] = batch
+                print(f"⚠️ {self.name}: flush of {len(batch)} items failed, will retry: {e}")
+                return False
+            except BaseException:
+                # Cancelled mid-write: keep the batch so stop() or the next flush retries it
+                self._buffer[:0] = batch
+                raise
+            self.flushes += 1
+            self.flushed += len(batch)
+            if len(self._buffer) >= self.max_batch:
+                self._wakeup.set()
+            return True
+
+    def stats(self) -> dict:
+        """Return queue counters"""
+        return {
+            "running": self.running,
+            "pending": len(self._buffer),
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "dropped": self.dropped
+        }